@@ -0,0 +1,89 @@
+"""
+Benchmark do executor das transformações durante a extração assíncrona.
+
+Simula a etapa de extração do pipeline: várias coroutines buscam municípios (a latência
+da API é simulada com asyncio.sleep) e transformam cada resposta com transform_data_infoDengue.
+Cada executor ('inline', 'thread' e 'process') é medido para respostas de tamanhos diferentes,
+mostrando a partir de que tamanho de resposta vale a pena tirar a transformação do loop de eventos.
+
+Uso:
+    poetry run python benchmarks/benchmark_executor.py --municipios 200 --latencia 0.05 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+import transform
+from benchmark_transform import payload_infoDengue
+from extract import INFODENGUE_FIELDS
+
+
+def colunas(semanas):
+    """
+    Gera uma resposta sintética no formato retornado por ColumnarJSONParser.
+
+    Args:
+        semanas (int): Número de semanas epidemiológicas (linhas).
+
+    Returns:
+        dict: Dicionário {campo: np.ndarray float64}.
+    """
+    registros = payload_infoDengue(semanas)
+    return {campo: np.array([r[campo] for r in registros], dtype='float64') for campo in INFODENGUE_FIELDS}
+
+
+async def extrair(municipios, resposta, latencia, concorrencia):
+    """
+    Executa a extração simulada e retorna a duração total em segundos.
+    """
+    fila = asyncio.Queue()
+    for ibge_code in range(municipios):
+        fila.put_nowait(ibge_code)
+
+    async def extrator():
+        while not fila.empty():
+            ibge_code = fila.get_nowait()
+            await asyncio.sleep(latencia)
+            if await transform.transform_data_infoDengue(resposta, ibge_code) is None:
+                raise RuntimeError('Falha na transformação.')
+
+    # Aquece o pool (criação das threads ou dos processos) fora da medição
+    await transform.transform_data_infoDengue(resposta, 0)
+    inicio = time.perf_counter()
+    await asyncio.gather(*[extrator() for _ in range(concorrencia)])
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--municipios', type=int, default=200, help='Número de municípios por medição.')
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência (s) simulada de cada requisição.')
+    parser.add_argument('--concorrencia', type=int, default=20, help='Número de coroutines de extração.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers dos pools.')
+    parser.add_argument('--semanas', type=int, nargs='+', default=[52, 260, 1040, 4160],
+                        help='Tamanhos das respostas (semanas por município) a serem medidos.')
+    args = parser.parse_args()
+
+    executores = ['inline', 'thread', 'process']
+    print(f'{args.municipios} municípios, latência {args.latencia * 1000:.0f} ms, '
+          f'concorrência {args.concorrencia}, {args.workers} workers')
+    print(f"{'semanas':>8}" + ''.join(f'{nome:>12}' for nome in executores) + f"{'melhor':>12}")
+    for semanas in args.semanas:
+        resposta = colunas(semanas)
+        duracoes = []
+        for executor in executores:
+            transform.configure_transform_executor(executor, args.workers)
+            duracoes.append(asyncio.run(extrair(args.municipios, resposta, args.latencia, args.concorrencia)))
+        transform.shutdown_transform_executor()
+        melhor = executores[int(np.argmin(duracoes))]
+        print(f'{semanas:>8}' + ''.join(f'{duracao:>11.2f}s' for duracao in duracoes) + f'{melhor:>12}')
+
+
+if __name__ == '__main__':
+    main()
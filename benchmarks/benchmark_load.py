@@ -0,0 +1,101 @@
+"""
+Benchmark da carga de dados de dengue no PostgreSQL.
+
+Compara a carga linha a linha pelo ORM (uma consulta e uma escrita por linha) com a carga
+em lote via INSERT ... ON CONFLICT DO UPDATE usada pelo pipeline.
+
+Usa o banco de dados configurado no arquivo .env. Os registros sintéticos usam um município
+fictício (ver municipio_ficticio.py) e são removidos ao final.
+
+Uso:
+    poetry run python benchmarks/benchmark_load.py --linhas 20000 --lote 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+from load import InfoDengue, create_db_session, init_db, upsert_dataframe
+from municipio_ficticio import ID_INICIAL, MUNICIPIO_FICTICIO, criar_municipio, limpar, limpar_infoDengue
+
+
+def dados_sinteticos(linhas):
+    """
+    Gera um DataFrame de dengue sintético com as colunas da tabela infoDengue.
+
+    Args:
+        linhas (int): Número de linhas a serem geradas.
+
+    Returns:
+        pd.DataFrame: DataFrame sintético.
+    """
+    rng = np.random.default_rng(42)
+    se = 202401 + np.arange(linhas) % 52
+    df = pd.DataFrame({
+        'infoDengueId': ID_INICIAL + np.arange(linhas),
+        'municipioId': MUNICIPIO_FICTICIO,
+        'ano': se // 100,
+        'semana': se % 100,
+        'semanaEpidemiologica': [f"{(x % 100):02d}/{x // 100}" for x in se],
+    })
+    for coluna in [c.name for c in InfoDengue.__table__.columns if c.name not in df.columns]:
+        df[coluna] = rng.random(linhas).round(2)
+    return df
+
+
+def upsert_orm(session, df):
+    """
+    Carga linha a linha pelo ORM, equivalente à implementação anterior de create_infoDengue.
+    """
+    colunas = [c.name for c in InfoDengue.__table__.columns]
+    for _, row in df.iterrows():
+        info_dengue = session.query(InfoDengue).filter_by(infoDengueId=int(row['infoDengueId'])).first()
+        if info_dengue is None:
+            info_dengue = InfoDengue()
+            session.add(info_dengue)
+        for coluna in colunas:
+            valor = row[coluna]
+            setattr(info_dengue, coluna, valor.item() if hasattr(valor, 'item') else valor)
+
+
+def medir(nome, funcao, df):
+    session = create_db_session()
+    try:
+        inicio = time.perf_counter()
+        funcao(session, df)
+        session.commit()
+        duracao = time.perf_counter() - inicio
+    finally:
+        session.close()
+    print(f"{nome:<32} {duracao:>8.2f} s  {len(df) / duracao:>10.0f} linhas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=20000, help='Número de linhas sintéticas.')
+    parser.add_argument('--lote', type=int, default=1000, help='Tamanho do lote da carga em lote.')
+    args = parser.parse_args()
+
+    df = dados_sinteticos(args.linhas)
+    init_db()
+    criar_municipio()
+
+    try:
+        # Cada caminho é medido na inserção (tabela vazia) e na atualização (linhas existentes)
+        medir('ORM - inserção', upsert_orm, df)
+        medir('ORM - atualização', upsert_orm, df)
+        limpar_infoDengue()
+        upsert_lote = lambda session, df: upsert_dataframe(session, InfoDengue, df, args.lote)
+        medir(f'Lote ({args.lote}) - inserção', upsert_lote, df)
+        medir(f'Lote ({args.lote}) - atualização', upsert_lote, df)
+    finally:
+        limpar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark de ponta a ponta do pipeline, sem acessar as APIs reais nem o banco de dados de produção.
+
+Para cada cenário (número de municípios), inicia o servidor simulado das APIs (mock_api.py),
+recria as tabelas em um PostgreSQL descartável e executa pipeline() completo. O tempo total e
+o tempo de cada etapa são lidos das métricas gravadas pela própria execução (ver metrics.py).
+
+Por padrão, o PostgreSQL é um contêiner Docker criado para o benchmark e removido ao final.
+Com --usar-banco-env, usa o banco configurado no arquivo .env, cujas tabelas são APAGADAS
+antes de cada cenário: use apenas com um banco de testes.
+
+Uso:
+    poetry run python benchmarks/benchmark_pipeline.py --cenarios 100 1000 5570 --latencia 0.05
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+MOCK_API = os.path.join(os.path.dirname(__file__), 'mock_api.py')
+
+
+def aguardar(condicao, timeout, mensagem):
+    """
+    Aguarda até que condicao() retorne True, verificando a cada 0,2 s.
+    """
+    limite = time.monotonic() + timeout
+    while not condicao():
+        if time.monotonic() > limite:
+            raise TimeoutError(mensagem)
+        time.sleep(0.2)
+
+
+def porta_aberta(porta):
+    try:
+        with socket.create_connection(('127.0.0.1', porta), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def postgres_descartavel(imagem):
+    """
+    Inicia um contêiner do PostgreSQL em uma porta livre e configura as variáveis DB_* para ele.
+
+    Args:
+        imagem (str): Imagem Docker do PostgreSQL.
+    """
+    import psycopg2
+
+    nome = f'etl-dengue-benchmark-{uuid.uuid4().hex[:8]}'
+    subprocess.run(
+        ['docker', 'run', '-d', '--rm', '--name', nome, '-p', '127.0.0.1::5432',
+         '-e', 'POSTGRES_USER=benchmark', '-e', 'POSTGRES_PASSWORD=benchmark', '-e', 'POSTGRES_DB=benchmark', imagem],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    try:
+        porta = subprocess.run(['docker', 'port', nome, '5432'], check=True, capture_output=True, text=True).stdout
+        os.environ.update({
+            'DB_HOST': '127.0.0.1', 'DB_PORT': porta.splitlines()[0].rsplit(':', 1)[1],
+            'DB_NAME': 'benchmark', 'DB_USER': 'benchmark', 'DB_PASS': 'benchmark',
+        })
+
+        def pronto():
+            # Durante a inicialização o contêiner aceita apenas conexões locais; a porta só responde quando o banco está pronto
+            try:
+                psycopg2.connect(host=os.environ['DB_HOST'], port=os.environ['DB_PORT'], dbname='benchmark',
+                                 user='benchmark', password='benchmark').close()
+                return True
+            except psycopg2.OperationalError:
+                return False
+
+        aguardar(pronto, 60, 'O PostgreSQL do benchmark não ficou pronto.')
+        yield
+    finally:
+        subprocess.run(['docker', 'stop', nome], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@contextmanager
+def servidor_simulado(porta, municipios, latencia, taxa_erro, semanas):
+    """
+    Executa mock_api.py em um processo separado, para não disputar o loop de eventos com o pipeline.
+    """
+    comando = [sys.executable, MOCK_API, '--porta', str(porta), '--municipios', str(municipios),
+               '--latencia', str(latencia), '--taxa-erro', str(taxa_erro)]
+    if semanas is not None:
+        comando += ['--semanas', str(semanas)]
+    processo = subprocess.Popen(comando)
+    try:
+        aguardar(lambda: porta_aberta(porta), 30, 'O servidor simulado não iniciou.')
+        yield
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def etapas(resumo):
+    """
+    Extrai do resumo das métricas o tempo somado e os quantis de latência de cada etapa.
+
+    Returns:
+        dict: {etapa: {'count', 'sum', 'p50', 'p95'}} somando os rótulos de cada histograma.
+    """
+    resultado = {}
+    for histograma in resumo['histograms']:
+        etapa = resultado.setdefault(histograma['name'].removesuffix('_seconds'), {'count': 0, 'sum': 0.0, 'p50': 0.0, 'p95': 0.0})
+        etapa['count'] += histograma['count']
+        etapa['sum'] += histograma['sum']
+        # Com vários rótulos, exibe o maior quantil (ex.: a extração do infoDengue, e não a do IBGE)
+        etapa['p50'] = max(etapa['p50'], histograma['p50'] or 0)
+        etapa['p95'] = max(etapa['p95'], histograma['p95'] or 0)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cenarios', type=int, nargs='+', default=[100, 1000, 5570], help='Números de municípios.')
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência média (s) das respostas simuladas.')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração das respostas simuladas com HTTP 503.')
+    parser.add_argument('--semanas', type=int, default=None, help='Semanas por resposta da Info Dengue (padrão é o ano atual).')
+    parser.add_argument('--porta', type=int, default=8089, help='Porta do servidor simulado.')
+    parser.add_argument('--imagem', default='postgres:16-alpine', help='Imagem Docker do PostgreSQL descartável.')
+    parser.add_argument('--usar-banco-env', action='store_true',
+                        help='Usa o banco do .env em vez de um contêiner (as tabelas são apagadas!).')
+    parser.add_argument('--saida', default=None, help='Arquivo JSON com os resumos completos de cada cenário.')
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='etl-dengue-benchmark-')
+    metrics_file = os.path.join(diretorio, 'metrics.jsonl')
+    # As variáveis são lidas na importação dos módulos do pipeline, que por isso só são importados depois
+    os.environ.update({
+        'IBGE_API_URL': f'http://127.0.0.1:{args.porta}/api/v1',
+        'INFODENGUE_API_URL': f'http://127.0.0.1:{args.porta}/api',
+        'HTTP_CACHE_ENABLED': 'false',
+        'HTTP_MAX_REQUESTS_PER_SECOND': '0',
+        'SNAPSHOT_DIR': os.path.join(diretorio, 'snapshot'),
+        'METRICS_FILE': metrics_file,
+        'METRICS_PROMETHEUS_FILE': '',
+    })
+    logging.basicConfig(level=logging.WARNING, filename=os.path.join(diretorio, 'pipeline.log'),
+                        format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
+
+    with nullcontext() if args.usar_banco_env else postgres_descartavel(args.imagem):
+        import main as pipeline_main
+        from load import Base, get_engine
+
+        print(f"latência {args.latencia * 1000:.0f} ms, taxa de erro {args.taxa_erro:.1%}, "
+              f"concorrência {pipeline_main.PIPELINE_CONCURRENCY}")
+        print(f"{'municípios':>10}{'total':>9}{'extração':>10}{'p50':>8}{'p95':>8}{'transf.':>9}"
+              f"{'carga':>8}{'resumo':>8}{'snapshot':>9}{'linhas/s':>10}{'MB':>7}{'retries':>8}")
+        resumos = []
+        for municipios in args.cenarios:
+            Base.metadata.drop_all(get_engine())
+            with servidor_simulado(args.porta, municipios, args.latencia, args.taxa_erro, args.semanas):
+                asyncio.run(pipeline_main.pipeline())
+            with open(metrics_file, encoding='utf-8') as f:
+                resumo = json.loads(f.readlines()[-1])
+            resumo['municipios'] = municipios
+            resumos.append(resumo)
+            tempo = etapas(resumo)
+            soma = lambda etapa: tempo.get(etapa, {}).get('sum', 0.0)
+            print(f"{municipios:>10}{resumo['duracao']:>8.1f}s{soma('extract'):>9.1f}s"
+                  f"{tempo.get('extract', {}).get('p50', 0) * 1000:>6.0f}ms{tempo.get('extract', {}).get('p95', 0) * 1000:>6.0f}ms"
+                  f"{soma('transform'):>8.1f}s{soma('load'):>7.1f}s{soma('summary_refresh'):>7.1f}s{soma('snapshot'):>8.1f}s"
+                  f"{resumo['linhasPorSegundo']:>10.0f}{resumo['bytesBaixados'] / 2**20:>7.1f}{resumo['novasTentativas']:>8}")
+        Base.metadata.drop_all(get_engine())
+
+    print('Tempos de extração, transformação e carga somam as operações concorrentes de cada etapa.')
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resumos, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
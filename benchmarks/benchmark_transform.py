@@ -0,0 +1,177 @@
+"""
+Micro-benchmark das transformações do pipeline.
+
+Compara a transformação dos municípios do IBGE com a implementação anterior (sete passadas
+de DataFrame.apply) usando um payload sintético com o mesmo formato da API do IBGE, e a
+transformação dos dados de dengue com a implementação anterior (float64 e formatação linha
+a linha), informando a memória economizada por milhão de linhas.
+
+Uso:
+    poetry run python benchmarks/benchmark_transform.py --municipios 5570 --semanas 530 --repeticoes 20
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+from transform import transform_data_municipios_IBGE, transform_data_infoDengue
+
+
+def payload_ibge(municipios):
+    """
+    Gera um payload sintético no formato de /api/v1/localidades/municipios.
+
+    Args:
+        municipios (int): Número de municípios.
+
+    Returns:
+        list: Lista de dicionários aninhados (microrregiao -> mesorregiao -> UF -> regiao).
+    """
+    regioes = [{'id': i, 'sigla': sigla, 'nome': nome} for i, (sigla, nome) in enumerate(
+        [('N', 'Norte'), ('NE', 'Nordeste'), ('SE', 'Sudeste'), ('S', 'Sul'), ('CO', 'Centro-Oeste')], start=1)]
+    ufs = [{'id': 11 + i, 'sigla': f'U{i:01d}', 'nome': f'Estado {i}', 'regiao': regioes[i % 5]} for i in range(27)]
+    return [
+        {
+            'id': 1100000 + i,
+            'nome': f'Município {i}',
+            'microrregiao': {
+                'id': 11000 + i % 558,
+                'nome': f'Microrregião {i % 558}',
+                'mesorregiao': {'id': 1100 + i % 137, 'nome': f'Mesorregião {i % 137}', 'UF': ufs[i % 27]},
+            },
+        }
+        for i in range(municipios)
+    ]
+
+
+def transform_municipios_apply(json):
+    """
+    Implementação anterior de transform_data_municipios_IBGE, usada como referência.
+    """
+    data = pd.DataFrame(json)
+    return pd.DataFrame({
+        'municipioId': data.apply(lambda x: x['id'], axis=1),
+        'municipioNome': data.apply(lambda x: x['nome'], axis=1),
+        'municipioNomeEstadoSigla': data.apply(lambda x: x['nome'], axis=1) + ' - ' + data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['sigla']),
+        'estadoNome': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['nome']),
+        'estadoSigla': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['sigla']),
+        'regiaoNome': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['regiao']['nome']),
+        'regiaoSigla': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['regiao']['sigla'])
+    })
+
+
+def payload_infoDengue(semanas):
+    """
+    Gera um payload sintético no formato de /api/alertcity/ para um município.
+
+    Args:
+        semanas (int): Número de semanas epidemiológicas (linhas).
+
+    Returns:
+        list: Lista de dicionários com os campos da API da Info Dengue.
+    """
+    rng = np.random.default_rng(42)
+    return [
+        {
+            'SE': (2010 + i // 52) * 100 + i % 52 + 1, 'id': 3550308 * 10**6 + i,
+            'casos_est': float(rng.gamma(2, 50)), 'casos_est_min': int(rng.integers(0, 80)),
+            'casos_est_max': float(rng.gamma(2, 80)), 'casos': int(rng.integers(0, 200)),
+            'p_rt1': float(rng.random()), 'p_inc100k': float(rng.gamma(2, 30)), 'nivel': int(rng.integers(1, 5)),
+            'Rt': float(rng.random() * 2), 'pop': 12396372.0,
+            'tempmin': float(rng.normal(18, 3)), 'tempmed': float(rng.normal(23, 3)), 'tempmax': float(rng.normal(28, 3)),
+            'umidmin': float(rng.normal(50, 10)), 'umidmed': float(rng.normal(70, 10)), 'umidmax': float(rng.normal(90, 5)),
+            'receptivo': int(rng.integers(0, 4)), 'transmissao': int(rng.integers(0, 4)), 'nivel_inc': int(rng.integers(0, 3)),
+            'notif_accum_year': int(rng.integers(0, 5000)),
+        }
+        for i in range(semanas)
+    ]
+
+
+def transform_infoDengue_float64(json, ibge_code):
+    """
+    Implementação anterior de transform_data_infoDengue, usada como referência.
+    """
+    data = pd.DataFrame(json)
+    return pd.DataFrame({
+        'municipioId': ibge_code,
+        'casosEstimados': data['casos_est'],
+        'casosEstimadosMin': data['casos_est_min'],
+        'casosEstimadosMax': data['casos_est_max'],
+        'casosNotificados': data['casos'],
+        'probabilidadeRtMaiorQueUm': round(data['p_rt1'], 2),
+        'taxaIncidenciaPor100k': round(data['p_inc100k'], 2),
+        'nivelAlerta': data['nivel'],
+        'infoDengueId': data['id'],
+        'estimativaRt': round(data['Rt'], 2),
+        'populacaoEstimada': data['pop'],
+        'temperaturaMinMedia': round(data['tempmin'], 2),
+        'temperaturaMedMedia': round(data['tempmed'], 2),
+        'temperaturaMaxMedia': round(data['tempmax'], 2),
+        'umidadeMinMedia': round(data['umidmin'], 2),
+        'umidadeMedMedia': round(data['umidmed'], 2),
+        'umidadeMaxMedia': round(data['umidmax'], 2),
+        'indicadorReceptividadeClimatica': data['receptivo'],
+        'evidenciaTransmissaoSustentada': data['transmissao'],
+        'nivelIncidencia': data['nivel_inc'],
+        'casosAcumuladosAno': data['notif_accum_year'],
+        'ano': data['SE'] // 100,
+        'semana': data['SE'] % 100,
+        'semanaEpidemiologica': data['SE'].apply(lambda x: f"{(x % 100):02d}/{x // 100}")
+    })
+
+
+def executar(coroutine):
+    """
+    Executa uma transformação assíncrona sem o custo de criar um loop de eventos a cada chamada.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as fim:
+        return fim.value
+    raise RuntimeError('A transformação não deveria aguardar nenhuma operação.')
+
+
+def medir(nome, funcao, repeticoes):
+    duracao = min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+    print(f"{nome:<40} {duracao * 1000:>10.2f} ms")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--municipios', type=int, default=5570, help='Número de municípios sintéticos.')
+    parser.add_argument('--semanas', type=int, default=530, help='Semanas sintéticas do município da Info Dengue.')
+    parser.add_argument('--repeticoes', type=int, default=20, help='Repetições de cada medição (vale a menor).')
+    args = parser.parse_args()
+
+    json = payload_ibge(args.municipios)
+    esperado = transform_municipios_apply(json)
+    obtido = executar(transform_data_municipios_IBGE(json))
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+    print(f'Transformação IBGE ({args.municipios} municípios)')
+    anterior = medir('DataFrame.apply (anterior)', lambda: transform_municipios_apply(json), args.repeticoes)
+    atual = medir('passada única (atual)', lambda: executar(transform_data_municipios_IBGE(json)), args.repeticoes)
+    print(f"{'ganho':<40} {anterior / atual:>10.1f}x")
+
+    json = payload_infoDengue(args.semanas)
+    ibge_code = 3550308
+    print(f'\nTransformação Info Dengue ({args.semanas} semanas)')
+    anterior = medir('float64 e apply (anterior)', lambda: transform_infoDengue_float64(json, ibge_code), args.repeticoes)
+    atual = medir('tipos compactos (atual)', lambda: executar(transform_data_infoDengue(json, ibge_code)), args.repeticoes)
+    print(f"{'ganho':<40} {anterior / atual:>10.1f}x")
+
+    memoria_anterior = transform_infoDengue_float64(json, ibge_code).memory_usage(deep=True).sum() / args.semanas
+    memoria_atual = executar(transform_data_infoDengue(json, ibge_code)).memory_usage(deep=True).sum() / args.semanas
+    print(f"{'memória por milhão de linhas (anterior)':<40} {memoria_anterior:>10.1f} MB")
+    print(f"{'memória por milhão de linhas (atual)':<40} {memoria_atual:>10.1f} MB")
+    print(f"{'economia por milhão de linhas':<40} {memoria_anterior - memoria_atual:>10.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
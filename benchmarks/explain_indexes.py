@@ -0,0 +1,139 @@
+"""
+Verifica com EXPLAIN os planos das consultas do dashboard.
+
+Insere um município fictício com alguns anos de dados, gera o plano (EXPLAIN em JSON) de cada
+consulta do dashboard e confere se as tabelas são lidas pelos índices esperados e, com
+DB_PARTITION_BY_YEAR=true, se apenas a partição do ano consultado é lida. Como em tabelas
+pequenas o PostgreSQL prefere a leitura sequencial, os planos são gerados com enable_seqscan
+desligado: a verificação é se o índice pode ser usado, e não o custo estimado.
+
+Usa o banco de dados configurado no arquivo .env (execute antes src/pipeline/migrate.py).
+Termina com código 1 se alguma verificação falhar.
+
+Uso:
+    poetry run python benchmarks/explain_indexes.py
+"""
+import json
+import os
+import sys
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+from load import (DB_PARTITION_BY_YEAR, InfoDengue, ReceptividadeMunicipioAno, create_db_session, get_engine, init_db,
+                  refresh_summary_tables, select_casosNotificados_por_ano, select_infoDengue_municipios)
+from municipio_ficticio import ESTADO_FICTICIO, ID_INICIAL, MUNICIPIO_FICTICIO, criar_municipio, limpar
+
+ANOS = range(2021, 2025)
+
+
+def preparar():
+    """
+    Insere o município fictício e uma linha por semana de cada ano de ANOS.
+    """
+    criar_municipio()
+    with create_db_session() as session:
+        session.add_all([
+            InfoDengue(infoDengueId=ID_INICIAL + ano * 100 + semana, municipioId=MUNICIPIO_FICTICIO, ano=ano, semana=semana,
+                       semanaEpidemiologica=f'{semana:02d}/{ano}', casosNotificados=semana)
+            for ano in ANOS for semana in range(1, 53)
+        ])
+        session.commit()
+    refresh_summary_tables([(MUNICIPIO_FICTICIO, ano) for ano in ANOS])
+
+
+def nos(plano):
+    """
+    Percorre recursivamente os nós de um plano do EXPLAIN em JSON.
+    """
+    yield plano
+    for filho in plano.get('Plans', []):
+        yield from nos(filho)
+
+
+def explicar(consulta):
+    """
+    Gera o plano de uma consulta com a leitura sequencial desligada.
+
+    Returns:
+        list: Nós do plano.
+    """
+    sql = str(consulta.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    with get_engine().begin() as connection:
+        connection.execute(text('SET LOCAL enable_seqscan = off'))
+        plano = connection.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return list(nos(plano[0]['Plan']))
+
+
+def verificar(nome, consulta, tabela, indices, ano=None):
+    """
+    Confere se a tabela foi lida por um dos índices esperados e, se particionada, apenas na partição do ano.
+
+    Os índices são identificados pelas colunas (ex.: 'municipioId_ano_semana'), pois nas partições
+    o PostgreSQL os nomeia a partir do nome da partição (ex.: infoDengue_2024_municipioId_ano_semana_idx).
+
+    Returns:
+        bool: True se todas as verificações passarem.
+    """
+    leituras = [no for no in explicar(consulta) if no.get('Relation Name', '').startswith(tabela)]
+    usados = set()
+    for no in leituras:
+        if 'Index Name' in no:
+            usados.add(no['Index Name'])
+        elif no['Node Type'] == 'Bitmap Heap Scan':
+            # O índice de uma leitura em bitmap aparece nos nós filhos (Bitmap Index Scan)
+            usados.update(filho['Index Name'] for filho in nos(no) if 'Index Name' in filho)
+        else:
+            usados.add(no['Node Type'])
+    ok = bool(leituras) and all(any(indice in usado for indice in indices) for usado in usados)
+    detalhe = f"índices: {', '.join(sorted(usados))}"
+    if DB_PARTITION_BY_YEAR and ano is not None:
+        particoes = {no['Relation Name'] for no in leituras}
+        ok = ok and particoes == {f'infoDengue_{ano}'}
+        detalhe += f"; partições: {', '.join(sorted(particoes))}"
+    print(f"{'OK' if ok else 'FALHOU':<7} {nome:<30} {detalhe}")
+    return ok
+
+
+def main():
+    init_db()
+    ano = max(ANOS)
+    # Se a preparação ou uma verificação lançar uma exceção, ela é propagada após a limpeza e o script termina com código 1
+    resultados = []
+    try:
+        # A preparação fica dentro do try para que dados parcialmente inseridos também sejam removidos
+        preparar()
+        resultados = [
+            verificar(
+                'município-ano (gráficos 1-4)',
+                select_infoDengue_municipios(
+                    ['semanaEpidemiologica', 'casosNotificados'],
+                    {'ano': ano, 'estadoSigla': ESTADO_FICTICIO, 'municipioNome': 'Benchmark'}),
+                'infoDengue', ['municipioId_ano_semana', 'ano_municipioId'], ano),
+            verificar(
+                'estado-ano (gráfico 5)',
+                select_infoDengue_municipios(
+                    ['municipioNome', 'semanaEpidemiologica', 'indicadorReceptividadeClimatica'],
+                    {'ano': ano, 'estadoSigla': ESTADO_FICTICIO}),
+                'infoDengue', ['municipioId_ano_semana', 'ano_municipioId'], ano),
+            verificar(
+                'casos por ano (gráfico 6)',
+                select_casosNotificados_por_ano({'estadoSigla': ESTADO_FICTICIO, 'municipioNome': 'Benchmark'}),
+                'resumoMunicipioAno', ['resumoMunicipioAno_pkey']),
+            verificar(
+                'receptividade (gráfico 5)',
+                select(ReceptividadeMunicipioAno.municipioNome, ReceptividadeMunicipioAno.indicadores).where(
+                    ReceptividadeMunicipioAno.estadoSigla == ESTADO_FICTICIO, ReceptividadeMunicipioAno.ano == ano),
+                'receptividadeMunicipioAno', ['estadoSigla_ano']),
+        ]
+    finally:
+        limpar()
+    sys.exit(0 if all(resultados) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Servidor HTTP local que simula as APIs do IBGE e da Info Dengue para os benchmarks.
+
+Responde em /api/v1/localidades/municipios com uma lista sintética de municípios e em
+/api/alertcity/ com uma semana epidemiológica sintética por linha, no intervalo pedido em
+ew_start/ey_start e ew_end/ey_end (limitado à semana atual, como a API real). A latência,
+a taxa de erros (HTTP 503) e o tamanho das respostas são configuráveis.
+
+Aponte o pipeline para o servidor com as variáveis de ambiente:
+    IBGE_API_URL=http://127.0.0.1:8089/api/v1
+    INFODENGUE_API_URL=http://127.0.0.1:8089/api
+
+Uso:
+    poetry run python benchmarks/mock_api.py --municipios 1000 --latencia 0.05 --taxa-erro 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import date
+
+import numpy as np
+from aiohttp import web
+
+from benchmark_transform import payload_ibge
+
+
+def semanas_pedidas(params, semanas=None):
+    """
+    Lista as semanas epidemiológicas (AAAASS) de uma consulta ao /api/alertcity/.
+
+    Args:
+        params (MultiDict): Parâmetros da consulta.
+        semanas (int, optional): Se informado, ignora o intervalo pedido e retorna este número de semanas.
+
+    Returns:
+        list: Semanas no formato AAAASS, da mais antiga para a mais recente.
+    """
+    hoje = date.today().isocalendar()
+    if semanas is not None:
+        return [(hoje.year - i // 52) * 100 + 52 - i % 52 for i in reversed(range(semanas))]
+    inicio = int(params.get('ey_start', hoje.year)) * 100 + int(params.get('ew_start', 1))
+    fim = min(int(params.get('ey_end', hoje.year)) * 100 + int(params.get('ew_end', 53)), hoje.year * 100 + hoje.week)
+    return [ano * 100 + semana for ano in range(inicio // 100, fim // 100 + 1) for semana in range(1, 53)
+            if inicio <= ano * 100 + semana <= fim]
+
+
+def payload_alertcity(geocode, semanas):
+    """
+    Gera o corpo de uma resposta do /api/alertcity/ para um município.
+
+    Args:
+        geocode (int): Código do município do IBGE.
+        semanas (list): Semanas epidemiológicas (AAAASS) da resposta.
+
+    Returns:
+        bytes: Array JSON com uma linha por semana.
+    """
+    rng = np.random.default_rng(geocode)
+    n = len(semanas)
+    colunas = {
+        'SE': semanas, 'id': [geocode * 10**6 + se for se in semanas],
+        'casos_est': rng.gamma(2, 50, n).round(2), 'casos_est_min': rng.integers(0, 80, n),
+        'casos_est_max': rng.gamma(2, 80, n).round(2), 'casos': rng.integers(0, 200, n),
+        'p_rt1': rng.random(n).round(4), 'p_inc100k': rng.gamma(2, 30, n).round(4), 'nivel': rng.integers(1, 5, n),
+        'Rt': (rng.random(n) * 2).round(4), 'pop': np.full(n, 100000.0),
+        'tempmin': rng.normal(18, 3, n).round(2), 'tempmed': rng.normal(23, 3, n).round(2), 'tempmax': rng.normal(28, 3, n).round(2),
+        'umidmin': rng.normal(50, 10, n).round(2), 'umidmed': rng.normal(70, 10, n).round(2), 'umidmax': rng.normal(90, 5, n).round(2),
+        'receptivo': rng.integers(0, 4, n), 'transmissao': rng.integers(0, 4, n), 'nivel_inc': rng.integers(0, 3, n),
+        'notif_accum_year': rng.integers(0, 5000, n),
+    }
+    colunas = {campo: np.asarray(valores).tolist() for campo, valores in colunas.items()}
+    return json.dumps([dict(zip(colunas, linha)) for linha in zip(*colunas.values())]).encode('utf-8')
+
+
+def create_app(municipios, latencia=0.0, taxa_erro=0.0, semanas=None):
+    """
+    Cria a aplicação aiohttp do servidor simulado.
+
+    Args:
+        municipios (int): Número de municípios retornados pela API do IBGE.
+        latencia (float, optional): Latência média (s) de cada resposta, com variação uniforme de ±50%.
+        taxa_erro (float, optional): Fração das requisições respondidas com HTTP 503.
+        semanas (int, optional): Número fixo de semanas por resposta da Info Dengue (padrão é o intervalo pedido).
+
+    Returns:
+        web.Application: Aplicação do servidor.
+    """
+    corpo_ibge = json.dumps(payload_ibge(municipios)).encode('utf-8')
+
+    async def simular_rede():
+        if latencia:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * latencia)
+        if random.random() < taxa_erro:
+            raise web.HTTPServiceUnavailable()
+
+    async def municipios_ibge(request):
+        await simular_rede()
+        return web.Response(body=corpo_ibge, content_type='application/json')
+
+    async def alertcity(request):
+        await simular_rede()
+        geocode = int(request.query['geocode'])
+        return web.Response(body=payload_alertcity(geocode, semanas_pedidas(request.query, semanas)), content_type='application/json')
+
+    app = web.Application()
+    app.router.add_get('/api/v1/localidades/municipios', municipios_ibge)
+    app.router.add_get('/api/alertcity/', alertcity)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--porta', type=int, default=8089, help='Porta do servidor.')
+    parser.add_argument('--municipios', type=int, default=5570, help='Número de municípios da API do IBGE.')
+    parser.add_argument('--latencia', type=float, default=0.05, help='Latência média (s) de cada resposta.')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='Fração das respostas com HTTP 503.')
+    parser.add_argument('--semanas', type=int, default=None,
+                        help='Número fixo de semanas por resposta da Info Dengue (padrão é o intervalo pedido).')
+    args = parser.parse_args()
+    web.run_app(create_app(args.municipios, args.latencia, args.taxa_erro, args.semanas),
+                host='127.0.0.1', port=args.porta, print=None, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Município fictício usado pelos benchmarks que gravam no banco de dados configurado no arquivo .env.
+
+Os registros sintéticos usam um código de município e um intervalo de infoDengueId que não
+existem nos dados reais, e são removidos por limpar() ao final de cada benchmark.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'pipeline'))
+
+from load import (IncidenciaEstadoSemana, InfoDengue, MunicipiosIBGE, ReceptividadeMunicipioAno, ResumoMunicipioAno,
+                  create_db_session)
+
+MUNICIPIO_FICTICIO = 9999999
+ESTADO_FICTICIO = 'ZZ'
+ID_INICIAL = 9_000_000_000_000  # Primeiro infoDengueId das linhas sintéticas
+
+
+def criar_municipio():
+    """
+    Remove os registros sintéticos de execuções anteriores e insere o município fictício.
+    """
+    limpar()
+    with create_db_session() as session:
+        session.add(MunicipiosIBGE(municipioId=MUNICIPIO_FICTICIO, municipioNome='Benchmark', estadoNome='Benchmark',
+                                   estadoSigla=ESTADO_FICTICIO, regiaoNome='Benchmark', regiaoSigla='ZZ'))
+        session.commit()
+
+
+def limpar_infoDengue():
+    """
+    Remove as linhas de dengue do município fictício e as linhas de resumo calculadas a partir delas.
+    """
+    with create_db_session() as session:
+        session.query(ResumoMunicipioAno).filter_by(municipioId=MUNICIPIO_FICTICIO).delete()
+        session.query(ReceptividadeMunicipioAno).filter_by(municipioId=MUNICIPIO_FICTICIO).delete()
+        session.query(IncidenciaEstadoSemana).filter_by(estadoSigla=ESTADO_FICTICIO).delete()
+        session.query(InfoDengue).filter_by(municipioId=MUNICIPIO_FICTICIO).delete()
+        session.commit()
+
+
+def limpar():
+    """
+    Remove todos os registros sintéticos, inclusive o município fictício.
+    """
+    limpar_infoDengue()
+    with create_db_session() as session:
+        session.query(MunicipiosIBGE).filter_by(municipioId=MUNICIPIO_FICTICIO).delete()
+        session.commit()
@@ -6,66 +6,55 @@ from charts import *
 # Configura o logging
 logging.basicConfig(level=logging.INFO, filename="logs/.log", filemode='w', format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
 
-# Função para aplicar filtros
-def aplicar_filtros(df, ano_filtrado, regiao_filtrada, estado_filtrado, municipio_filtrado):
-    df_filtrado = df[
-        (df['ano'] == ano_filtrado) &
-        (df['regiaoNome'] == regiao_filtrada) &
-        (df['estadoNome'] == estado_filtrado) &
-        (df['municipioNome'] == municipio_filtrado)
-    ].reset_index(drop=True)
-    return df_filtrado
-
-def menu_sidebar(df):
+def menu_sidebar(indice):
     # Filtro por ano
-    ano_filtrado = st.sidebar.selectbox('Selecione o Ano', df['ano'].unique())
+    ano_filtrado = st.sidebar.selectbox('Selecione o Ano', list(indice))
 
-    # Filtrar dados para o ano selecionado
-    df_ano_filtrado = df[df['ano'] == ano_filtrado]
-
-    # Filtro por região
-    regiao_filtrada = st.sidebar.selectbox('Selecione a Região', df_ano_filtrado['regiaoNome'].unique())
+    # Filtro por região, entre as regiões com dados no ano selecionado
+    regioes = indice[ano_filtrado]
+    regiao_filtrada = st.sidebar.selectbox('Selecione a Região', list(regioes))
 
     # Filtrar estados com base na região selecionada
-    estados_regiao = df_ano_filtrado[df_ano_filtrado['regiaoNome'] == regiao_filtrada]['estadoNome'].unique()
-    estado_filtrado = st.sidebar.selectbox('Selecione o Estado', estados_regiao)
+    estados_regiao = regioes[regiao_filtrada]
+    estado_filtrado = st.sidebar.selectbox('Selecione o Estado', list(estados_regiao))
 
     # Filtrar municípios com base no estado selecionado
-    municipios_estado = df_ano_filtrado[df_ano_filtrado['estadoNome'] == estado_filtrado]['municipioNome'].unique()
-    municipio_filtrado = st.sidebar.selectbox('Selecione o Município', municipios_estado)
-
-    # Aplicar filtros
-    df_filtrado = aplicar_filtros(df_ano_filtrado, ano_filtrado, regiao_filtrada, estado_filtrado, municipio_filtrado)
+    estado_sigla, municipios = estados_regiao[estado_filtrado]
+    municipio_filtrado = st.sidebar.selectbox('Selecione o Município', municipios)
 
-    # Ordenar o DataFrame pela coluna 'semanaEpidemiologica'
-    df_filtrado = df_filtrado.sort_values(by='semanaEpidemiologica').reset_index(drop=True)
-
-    return df_filtrado, municipio_filtrado, estado_filtrado, ano_filtrado
+    return municipio_filtrado, estado_filtrado, estado_sigla, ano_filtrado
 
 def app_main():
 
-    data = load_data_municipios()
+    # Versão dos dados, que invalida os caches das consultas após cada carga do pipeline
+    versao = data_version()
+    indice = load_indice(versao)
+    if not indice:
+        st.warning('Nenhum dado disponível. Execute o pipeline para carregar os dados.')
+        return
 
-    df_filtrado, municipio_filtrado, estado_filtrado, ano_filtrado = menu_sidebar(data)
+    municipio_filtrado, estado_filtrado, estado_sigla, ano_filtrado = menu_sidebar(indice)
 
     st.subheader(f'Análise do município de {municipio_filtrado}, estado de {estado_filtrado}, ano de {ano_filtrado}.')
     st.caption('Dados extraídos do [InfoDengue](https://info.dengue.mat.br/) e [IBGE](https://www.ibge.gov.br/).')
     st.divider()
 
-    # Restante do código para plotar os gráficos
-    grafico1(df_filtrado)
+    # Cada gráfico busca apenas os dados da seleção e reutiliza a figura já montada para ela
+    selecao = (versao, ano_filtrado, estado_sigla, municipio_filtrado)
+
+    grafico1(*selecao)
 
-    grafico2(df_filtrado)
+    grafico2(*selecao)
     
-    grafico3(df_filtrado)
+    grafico3(*selecao)
 
-    grafico4(df_filtrado)
+    grafico4(*selecao)
     
-    grafico5(data, municipio_filtrado, estado_filtrado)
+    grafico5(versao, ano_filtrado, estado_sigla)
 
-    grafico6(data, municipio_filtrado)
+    grafico6(versao, estado_sigla, municipio_filtrado)
 
-    tabela_resumo(df_filtrado)
+    tabela_resumo(*selecao)
 
 
             
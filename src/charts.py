@@ -1,22 +1,38 @@
 import streamlit as st
 import plotly.express as px
-from load_app import labels_columns
+import pandas as pd
+import numpy as np
+import os
+from load_app import labels_columns, SEM_DADO, load_municipio_ano, load_matriz_receptividade, load_casos_por_ano
 
-def grafico1(df_filtrado):
-    # Gráfico 1: Comparação entre Casos Estimados e Casos Notificados por Semana
-    st.subheader('Comparação entre Casos Estimados e Casos Notificados por Semana')
-    st.caption('Número de casos notificados, número de casos estimados usando o modelo de nowcasting e intervalo de credibilidade de 95% do número de casos estimados.')
+# Número máximo de municípios exibidos por página no mapa de calor do gráfico 5
+GRAFICO5_MUNICIPIOS_POR_PAGINA = int(os.environ.get('GRAFICO5_MUNICIPIOS_POR_PAGINA', 50))
+# Número máximo de figuras e tabelas mantidas em cache por gráfico (as mais antigas são descartadas)
+FIGURE_CACHE_MAX_ENTRIES = int(os.environ.get('FIGURE_CACHE_MAX_ENTRIES', 64))
+
+# As figuras e tabelas são montadas uma única vez por seleção (versão dos dados, ano, estado, município)
+# e compartilhadas entre as execuções do script; por isso não devem ser modificadas após montadas.
+figura_em_cache = st.cache_resource(max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+
+@figura_em_cache
+def figura1(versao, ano, estado_sigla, municipio):
+    df_filtrado = load_municipio_ano(versao, ano, estado_sigla, municipio)
     fig1 = px.line(df_filtrado, x='semanaEpidemiologica', y=['casosEstimados', 'casosNotificados'], labels=labels_columns)
     fig1.add_scatter(x=df_filtrado['semanaEpidemiologica'], y=df_filtrado['casosEstimadosMin'], 
                     mode='lines', line=dict(dash='dash'), name='casosEstimadosMin')
     fig1.add_scatter(x=df_filtrado['semanaEpidemiologica'], y=df_filtrado['casosEstimadosMax'], 
                     mode='lines', line=dict(dash='dash'), name='casosEstimadosMax')
-    st.plotly_chart(fig1)
+    return fig1
 
-def grafico2(df_filtrado):
-    # Gráfico 2: Probabilidade de Rt > 1 por Semana
-    st.subheader('Probabilidade de Rt > 1 por Semana')
-    st.caption('Probabilidade de (Rt > 1). Para emitir o alerta laranja, usamos o critério p_rt1 > 0,95 por 3 semanas ou mais.')
+def grafico1(versao, ano, estado_sigla, municipio):
+    # Gráfico 1: Comparação entre Casos Estimados e Casos Notificados por Semana
+    st.subheader('Comparação entre Casos Estimados e Casos Notificados por Semana')
+    st.caption('Número de casos notificados, número de casos estimados usando o modelo de nowcasting e intervalo de credibilidade de 95% do número de casos estimados.')
+    st.plotly_chart(figura1(versao, ano, estado_sigla, municipio))
+
+@figura_em_cache
+def figura2(versao, ano, estado_sigla, municipio):
+    df_filtrado = load_municipio_ano(versao, ano, estado_sigla, municipio)
     fig2 = px.line(df_filtrado, x='semanaEpidemiologica', y='probabilidadeRtMaiorQueUm', text='probabilidadeRtMaiorQueUm', labels=labels_columns)
     fig2.update_traces(fill='tozeroy', textposition='top right')
     fig2.add_shape(
@@ -29,23 +45,34 @@ def grafico2(df_filtrado):
     )
     # Configurações de layout
     fig2.update_layout(yaxis_tickvals=[])
-    st.plotly_chart(fig2)
+    return fig2
 
-def grafico3(df_filtrado):
-    # Gráfico 3: Taxa de Incidência por 100.000 Habitantes por Semana
-    st.subheader('Taxa de Incidência por 100.000 Habitantes por Semana')
-    st.caption('Taxa de incidência estimada por 100.000 habitantes')
+def grafico2(versao, ano, estado_sigla, municipio):
+    # Gráfico 2: Probabilidade de Rt > 1 por Semana
+    st.subheader('Probabilidade de Rt > 1 por Semana')
+    st.caption('Probabilidade de (Rt > 1). Para emitir o alerta laranja, usamos o critério p_rt1 > 0,95 por 3 semanas ou mais.')
+    st.plotly_chart(figura2(versao, ano, estado_sigla, municipio))
+
+@figura_em_cache
+def figura3(versao, ano, estado_sigla, municipio):
+    df_filtrado = load_municipio_ano(versao, ano, estado_sigla, municipio)
     fig3 = px.line(df_filtrado, x='semanaEpidemiologica', y='taxaIncidenciaPor100k', text='taxaIncidenciaPor100k', labels=labels_columns)
     # Adicionar rótulos de valores aos pontos de dados
     fig3.update_traces(textposition='top right')
     fig3.update_traces(marker=dict(color='orange'), selector=dict(type='scatter', mode='markers', y='probabilidadeRtMaiorQueUm', y0=0.95))
     # Configurações de layout
     fig3.update_layout(yaxis_tickvals=[])
-    st.plotly_chart(fig3)
+    return fig3
 
-def grafico4(df_filtrado):
-        # Gráfico 4: Evidência de Transmissão Sustentada
-    st.subheader('Evidência de Transmissão Sustentada por Semana')
+def grafico3(versao, ano, estado_sigla, municipio):
+    # Gráfico 3: Taxa de Incidência por 100.000 Habitantes por Semana
+    st.subheader('Taxa de Incidência por 100.000 Habitantes por Semana')
+    st.caption('Taxa de incidência estimada por 100.000 habitantes')
+    st.plotly_chart(figura3(versao, ano, estado_sigla, municipio))
+
+@figura_em_cache
+def tabela4(versao, ano, estado_sigla, municipio):
+    df_filtrado = load_municipio_ano(versao, ano, estado_sigla, municipio)
     # Definindo a regra de cores e a legenda
     legenda_evidencia = {
         0: '0 - Nenhuma evidência',
@@ -53,50 +80,70 @@ def grafico4(df_filtrado):
         2: '2 - Provável',
         3: '3 - Altamente provável'
     }
-    # Criar DataFrame apenas com as colunas necessárias
-    df_tabela = df_filtrado[['semanaEpidemiologica', 'evidenciaTransmissaoSustentada']]
-    # Mapear os valores numéricos para suas respectivas legendas
-    df_tabela['Evidência de Transmissão Sustentada'] = df_tabela['evidenciaTransmissaoSustentada'].map(legenda_evidencia)
-    # Remover a coluna de valores numéricos
-    df_tabela.drop(columns=['evidenciaTransmissaoSustentada'], inplace=True)
-    # Renomear as colunas
-    df_tabela.columns = ['Semana Epidemiológica', 'Evidência de Transmissão Sustentada']
+    # Monta um novo DataFrame com a semana e a legenda correspondente ao valor numérico da evidência
+    return pd.DataFrame({
+        'Semana Epidemiológica': df_filtrado['semanaEpidemiologica'],
+        'Evidência de Transmissão Sustentada': df_filtrado['evidenciaTransmissaoSustentada'].map(legenda_evidencia)
+    })
+
+def grafico4(versao, ano, estado_sigla, municipio):
+        # Gráfico 4: Evidência de Transmissão Sustentada
+    st.subheader('Evidência de Transmissão Sustentada por Semana')
     # Exibir a tabela
-    st.write(df_tabela)
+    st.write(tabela4(versao, ano, estado_sigla, municipio))
 
-def grafico5(data, ano_filtrado, estado_filtrado):
-        # Gráfico 5: Mapa de Calor: Indicador Receptividade Climática dos municípios do estado
-    st.subheader('Indicador Receptividade Climática')
-    st.caption('Legenda:\n0 = desfavorável,\n1 = favorável,\n2 = favorável nesta semana e na semana passada,\n3 = favorável por pelo menos três semanas (suficiente para completar um ciclo de transmissão).')
-    df_ano_filtrado = data[data['ano'] == ano_filtrado]
-    df_filtrado_estado = df_ano_filtrado[df_ano_filtrado['estadoNome'] == estado_filtrado]
-    fig5 = px.imshow(df_filtrado_estado[['semanaEpidemiologica', 'municipioNome', 'indicadorReceptividadeClimatica']].pivot_table(index='municipioNome', columns='semanaEpidemiologica', values='indicadorReceptividadeClimatica'), 
-                            labels=labels_columns, color_continuous_scale=['#01DB3B', '#DB0006'])
-    # Ajustando as dimensões do layout do gráfico
-    fig5.update_layout(height=1000, coloraxis=dict(
+@figura_em_cache
+def figura5(versao, ano, estado_sigla, inicio):
+    matriz = load_matriz_receptividade(versao, ano, estado_sigla)
+    fim = inicio + GRAFICO5_MUNICIPIOS_POR_PAGINA
+    valores = matriz['valores'][inicio:fim].astype('float32')
+    valores[valores == SEM_DADO] = np.nan
+    fig5 = px.imshow(valores, x=matriz['semanas'], y=matriz['municipios'][inicio:fim], aspect='auto',
+                     labels={'x': labels_columns['semanaEpidemiologica'], 'y': labels_columns['municipioNome'],
+                             'color': labels_columns['indicadorReceptividadeClimatica']},
+                     color_continuous_scale=['#01DB3B', '#DB0006'])
+    # Ajustando as dimensões do layout do gráfico ao número de municípios da página
+    fig5.update_layout(height=min(200 + 18 * len(valores), 1100), coloraxis=dict(
                                 cmin=0, # Define o limite mínimo da escala de cores  
                                 cmax=3  # Define o limite máximo da escala de cores
                                 ))
-    # Exibindo o gráfico centralizado
-    st.plotly_chart(fig5, use_container_width=True, align='center')
+    return fig5
 
-def grafico6(data, municipio_filtrado):
-    # Gráfico 6: Casos Acumulados por Ano (considerando o filtro de município)
-    st.subheader('Casos Acumulados por Ano no Município')
-    st.caption('Número acumulado de casos notificados no ano.')
-    # Pega o DataFrame principal e filtra o município
-    df_filtrado_municipio = data[(data['municipioNome'] == municipio_filtrado)]
-    # Soma todos os casos notificados do ano 
-    df_casos_acumulados_por_ano = df_filtrado_municipio.groupby('ano')['casosNotificados'].sum().reset_index()
+def grafico5(versao, ano, estado_sigla):
+        # Gráfico 5: Mapa de Calor: Indicador Receptividade Climática dos municípios do estado
+    st.subheader('Indicador Receptividade Climática')
+    st.caption('Legenda:\n0 = desfavorável,\n1 = favorável,\n2 = favorável nesta semana e na semana passada,\n3 = favorável por pelo menos três semanas (suficiente para completar um ciclo de transmissão).')
+    municipios = load_matriz_receptividade(versao, ano, estado_sigla)['municipios']
+    if not municipios:
+        st.info('Sem dados de receptividade climática para o estado no ano selecionado.')
+        return
+    # Exibe uma página de municípios por vez, do maior para o menor número de casos notificados,
+    # limitando o tamanho da figura enviada ao navegador
+    paginas = range(0, len(municipios), GRAFICO5_MUNICIPIOS_POR_PAGINA)
+    inicio = st.selectbox(
+        'Municípios (ordenados por casos notificados no ano)', paginas,
+        format_func=lambda i: f'{i + 1} a {min(i + GRAFICO5_MUNICIPIOS_POR_PAGINA, len(municipios))} de {len(municipios)}'
+    )
+    st.plotly_chart(figura5(versao, ano, estado_sigla, inicio), use_container_width=True)
+
+@figura_em_cache
+def figura6(versao, estado_sigla, municipio):
+    # A soma dos casos notificados de cada ano do município já vem agregada do snapshot ou da tabela de resumo
+    df_casos_acumulados_por_ano = load_casos_por_ano(versao, estado_sigla, municipio)
     # Montando o gráfico de barras
     fig6 = px.bar(df_casos_acumulados_por_ano, x='ano', y='casosNotificados', text='casosNotificados', labels=labels_columns)
     fig6.update_xaxes(tickformat="d")  # Definir a escala do eixo x como inteiros
     fig6.update_layout(yaxis_tickvals=[])
-    st.plotly_chart(fig6)
+    return fig6
 
-def tabela_resumo(df_filtrado):
-    # Título da tabela de resumo
-    st.subheader('Tabela de Resumo dos Dados')
+def grafico6(versao, estado_sigla, municipio):
+    # Gráfico 6: Casos Acumulados por Ano (considerando o filtro de município)
+    st.subheader('Casos Acumulados por Ano no Município')
+    st.caption('Número acumulado de casos notificados no ano.')
+    st.plotly_chart(figura6(versao, estado_sigla, municipio))
+
+@figura_em_cache
+def tabela_resumo_dados(versao, ano, estado_sigla, municipio):
     # Lista de colunas utilizadas em todos os gráficos
     colunas_utilizadas = [
         "semanaEpidemiologica", "regiaoNome", "estadoNome", "municipioNome",
@@ -106,7 +153,11 @@ def tabela_resumo(df_filtrado):
         "umidadeMinMedia", "umidadeMedMedia", "umidadeMaxMedia",
         "indicadorReceptividadeClimatica", "evidenciaTransmissaoSustentada"
     ]
-    # Criar DataFrame com as colunas utilizadas
-    df_resumo = df_filtrado[colunas_utilizadas]
+    # Criar DataFrame com as colunas utilizadas e os rótulos
+    return load_municipio_ano(versao, ano, estado_sigla, municipio)[colunas_utilizadas].rename(columns=labels_columns)
+
+def tabela_resumo(versao, ano, estado_sigla, municipio):
+    # Título da tabela de resumo
+    st.subheader('Tabela de Resumo dos Dados')
     # Exibir a tabela de resumo
-    st.write(df_resumo.rename(columns=labels_columns))
\ No newline at end of file
+    st.write(tabela_resumo_dados(versao, ano, estado_sigla, municipio))
@@ -1,15 +1,18 @@
 import streamlit as st
 import pandas as pd
-from pipeline.load import get_all_municipiosIBGE, get_all_infoDengue
+import numpy as np
+import pyarrow.dataset as ds
+from functools import reduce
+from pipeline.load import init_db, get_infoDengue_municipios, get_casosNotificados_por_ano, get_receptividade_estado_ano, get_casosNotificados_municipios_ano, get_data_version
+from pipeline.snapshot import read_snapshot, snapshot_version
+import os
 
-# Converter colunas numéricas para tipos adequados
-numeric_columns = [
-    "casosEstimados", "casosEstimadosMin", "casosEstimadosMax", "casosNotificados",
-    "probabilidadeRtMaiorQueUm", "taxaIncidenciaPor100k", "estimativaRt", "populacaoEstimada",
-    "temperaturaMinMedia", "temperaturaMedMedia", "temperaturaMaxMedia",
-    "umidadeMinMedia", "umidadeMedMedia", "umidadeMaxMedia",
-    "indicadorReceptividadeClimatica", "evidenciaTransmissaoSustentada", "casosAcumuladosAno"
-]
+# Configuração dos caches do dashboard
+DATA_VERSION_TTL = int(os.environ.get('DATA_VERSION_TTL', 60))  # Intervalo (s) entre as verificações da versão dos dados
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))  # Número máximo de resultados mantidos por consulta
+
+# Valor das células sem dado na matriz de receptividade climática (os indicadores vão de 0 a 3)
+SEM_DADO = 255
 
 # Rótulos para as colunas
 labels_columns = {
@@ -38,80 +41,133 @@ labels_columns = {
 }
 
 
-def municipios_dataframe():
+# Cria as tabelas uma única vez por processo do Streamlit
+@st.cache_resource()
+def bootstrap_db():
+    init_db()
+
+@st.cache_data(ttl=DATA_VERSION_TTL)
+def data_version():
+    """
+    Versão dos dados exibidos pelo dashboard.
+
+    É a versão do manifesto do snapshot ou, sem snapshot, o ID da última execução do pipeline
+    que carregou dados. Todas as consultas em cache recebem a versão como argumento, de modo que
+    uma nova carga invalida os resultados anteriores sem limpar o cache inteiro; a própria versão
+    é verificada a cada DATA_VERSION_TTL segundos.
+
+    Returns:
+        tuple: (origem dos dados, versão).
+    """
+    versao = snapshot_version()
+    if versao is not None:
+        return 'snapshot', versao
+    bootstrap_db()
+    return 'db', get_data_version()
+
+def filtro_snapshot(filters):
+    """
+    Converte filtros de igualdade {coluna: valor} em uma expressão do pyarrow.
+    """
+    if not filters:
+        return None
+    return reduce(lambda a, b: a & b, [ds.field(column) == value for column, value in filters.items()])
+
+def consultar(columns, filters=None, distinct=False):
+    """
+    Lê apenas as colunas e as linhas necessárias do snapshot ou, se ele não existir, do banco de dados.
+
+    Cada consulta do dashboard (listas dos filtros, município-ano, estado-ano) lê só o que exibe,
+    de modo que o tempo de carregamento não cresce com o total de linhas armazenadas.
+
+    Args:
+        columns (list): Colunas a serem lidas.
+        filters (dict, optional): Filtros de igualdade no formato {coluna: valor}. Filtros sobre ano e
+            estadoSigla descartam partições inteiras do snapshot.
+        distinct (bool, optional): Se True, retorna apenas as combinações distintas das colunas.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas pedidas.
+    """
+    data = read_snapshot(columns=columns, filters=filtro_snapshot(filters or {}))
+    if data is None:
+        bootstrap_db()
+        return get_infoDengue_municipios(columns=columns, filters=filters, distinct=distinct)
+    return data.drop_duplicates(ignore_index=True) if distinct else data
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_indice(versao):
     """
-    Obtém todos os municípios do banco de dados e os coloca em um DataFrame do Pandas.
+    Índice hierárquico ano → região → estado → município dos filtros da barra lateral.
+
+    É montado com uma única leitura das combinações distintas por versão dos dados, de modo que
+    cada seleção na barra lateral é uma consulta a um dicionário, independente do total de linhas.
 
     Returns:
-        df_municipios (DataFrame): DataFrame contendo todos os municípios.
+        dict: {ano: {regiaoNome: {estadoNome: (estadoSigla, [municipioNome, ...])}}}, com os anos do
+            mais recente para o mais antigo e os demais níveis em ordem alfabética.
     """
-    municipios = get_all_municipiosIBGE()
-    # Extrair os dados para um DataFrame
-    data = [
-        {
-            'municipioId': municipio.municipioId,
-            'municipioNome': municipio.municipioNome,
-            'estadoNome': municipio.estadoNome,
-            'estadoSigla': municipio.estadoSigla,
-            'regiaoNome': municipio.regiaoNome,
-            'regiaoSigla': municipio.regiaoSigla
-        }
-        for municipio in municipios
-    ]
-    df_municipios = pd.DataFrame(data)
-    return df_municipios
-
-def infodengue_dataframe():
+    combinacoes = consultar(['ano', 'regiaoNome', 'estadoNome', 'estadoSigla', 'municipioNome'], distinct=True)
+    combinacoes = combinacoes.sort_values(['ano', 'regiaoNome', 'estadoNome', 'municipioNome'], ascending=[False, True, True, True])
+    indice = {}
+    for ano, regiao, estado, sigla, municipio in combinacoes.itertuples(index=False):
+        estados = indice.setdefault(int(ano), {}).setdefault(regiao, {})
+        estados.setdefault(estado, (sigla, []))[1].append(municipio)
+    return indice
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_municipio_ano(versao, ano, estado_sigla, municipio):
+    """
+    Dados de dengue de um município em um ano, ordenados pela semana epidemiológica (gráficos 1 a 4 e tabela de resumo).
+    """
+    data = consultar(list(labels_columns), {'ano': ano, 'estadoSigla': estado_sigla, 'municipioNome': municipio})
+    return data.sort_values(by='semanaEpidemiologica').reset_index(drop=True)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_matriz_receptividade(versao, ano, estado_sigla):
     """
-    Obtém todos os dados de dengue do banco de dados e os coloca em um DataFrame do Pandas.
+    Matriz município × semana do indicador de receptividade climática de um estado em um ano (gráfico 5).
+
+    A matriz é mantida em cache como um array uint8 (SEM_DADO nas células sem dado), com os municípios
+    ordenados do maior para o menor número de casos notificados no ano, para que o gráfico exiba
+    apenas uma página de municípios sem refazer o pivoteamento.
 
     Returns:
-        df_infoDengue (DataFrame): DataFrame contendo todos os dados de dengue.
+        dict: {'municipios': [municipioNome, ...], 'semanas': [semanaEpidemiologica, ...], 'valores': np.ndarray}.
+    """
+    data = read_snapshot(columns=['municipioNome', 'semanaEpidemiologica', 'indicadorReceptividadeClimatica', 'casosNotificados'],
+                         filters=filtro_snapshot({'ano': ano, 'estadoSigla': estado_sigla}))
+    if data is None:
+        # Sem snapshot, lê a matriz e os totais anuais já agregados nas tabelas de resumo
+        bootstrap_db()
+        data = get_receptividade_estado_ano(ano, estado_sigla)
+        casos = get_casosNotificados_municipios_ano(ano, estado_sigla).set_index('municipioNome')['casosNotificados']
+    else:
+        casos = data.groupby('municipioNome')['casosNotificados'].sum()
+
+    linhas, municipios = pd.factorize(data['municipioNome'])
+    colunas, semanas = pd.factorize(data['semanaEpidemiologica'], sort=True)
+    valores = np.full((len(municipios), len(semanas)), SEM_DADO, dtype='uint8')
+    indicador = data['indicadorReceptividadeClimatica'].to_numpy()
+    com_dado = ~np.isnan(indicador)
+    valores[linhas[com_dado], colunas[com_dado]] = indicador[com_dado].astype('uint8')
+
+    # Ordena pelo número de casos notificados (decrescente) e, nos empates, pelo nome do município
+    ordem = pd.DataFrame({'municipio': municipios, 'casos': casos.reindex(municipios).fillna(0).to_numpy()}).sort_values(
+        ['casos', 'municipio'], ascending=[False, True]).index.to_numpy()
+    return {'municipios': list(municipios[ordem]), 'semanas': list(semanas), 'valores': valores[ordem]}
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_casos_por_ano(versao, estado_sigla, municipio):
+    """
+    Casos notificados por ano de um município (gráfico 6).
     """
-    infoDengue = get_all_infoDengue()
-    # Extrair os dados para um DataFrame
-    data = [
-        {
-            'infoDengueId': info.infoDengueId,
-            'municipioId': info.municipioId,
-            'ano': info.ano,
-            'semana': info.semana,
-            'semanaEpidemiologica': info.semanaEpidemiologica,
-            'casosEstimados': info.casosEstimados,
-            'casosEstimadosMin': info.casosEstimadosMin,
-            'casosEstimadosMax': info.casosEstimadosMax,
-            'casosNotificados': info.casosNotificados,
-            'probabilidadeRtMaiorQueUm': info.probabilidadeRtMaiorQueUm,
-            'taxaIncidenciaPor100k': info.taxaIncidenciaPor100k,
-            'nivelAlerta': info.nivelAlerta,
-            'estimativaRt': info.estimativaRt,
-            'populacaoEstimada': info.populacaoEstimada,
-            'temperaturaMinMedia': info.temperaturaMinMedia,
-            'temperaturaMedMedia': info.temperaturaMedMedia,
-            'temperaturaMaxMedia': info.temperaturaMaxMedia,
-            'umidadeMinMedia': info.umidadeMinMedia,
-            'umidadeMedMedia': info.umidadeMedMedia,
-            'umidadeMaxMedia': info.umidadeMaxMedia,
-            'indicadorReceptividadeClimatica': info.indicadorReceptividadeClimatica,
-            'evidenciaTransmissaoSustentada': info.evidenciaTransmissaoSustentada,
-            'nivelIncidencia': info.nivelIncidencia,
-            'casosAcumuladosAno': info.casosAcumuladosAno
-        }
-        for info in infoDengue
-    ]
-    df_infoDengue = pd.DataFrame(data)
-    return df_infoDengue
-
-# Carregar os dados em cache
-@st.cache_data()
-def load_data_municipios():
-    infodengue = infodengue_dataframe()
-    municipios = municipios_dataframe()
-    if infodengue.empty or municipios.empty:
-        return []  
+    filters = {'estadoSigla': estado_sigla, 'municipioNome': municipio}
+    data = read_snapshot(columns=['ano', 'casosNotificados'], filters=filtro_snapshot(filters))
+    if data is None:
+        # Sem snapshot, lê os totais anuais da tabela de resumo
+        bootstrap_db()
+        data = get_casosNotificados_por_ano(filters)
     else:
-        data = pd.merge(municipios, infodengue, on='municipioId', how='inner')
-        # Converter colunas numéricas para tipos adequados
-        for col in numeric_columns:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
-        return data
\ No newline at end of file
+        data = data.groupby('ano', as_index=False)['casosNotificados'].sum()
+    return data.fillna({'casosNotificados': 0})
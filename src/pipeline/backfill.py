@@ -0,0 +1,144 @@
+from extract import create_http_session, log_request_stats, get_data_infoDengue, rate_limiter
+from transform import transform_data_infoDengue, configure_transform_executor, shutdown_transform_executor
+from load import init_db, dispose_engines, get_municipioId_municipiosIBGE, plan_backfill_jobs, get_pending_backfill_jobs, update_backfill_jobs
+from main import StageStats, loader_infoDengue, run_stages, pipeline_municipiosIBGE, finish_run, PIPELINE_CONCURRENCY, PIPELINE_QUEUE_SIZE
+from datetime import date, datetime
+import argparse
+import logging
+import asyncio
+import time
+
+def year_ranges(start_year, end_year, chunk_years):
+    """
+    Divide um intervalo de anos em blocos consecutivos.
+
+    Args:
+        start_year (int): Ano inicial.
+        end_year (int): Ano final.
+        chunk_years (int): Número de anos por bloco.
+
+    Returns:
+        list: Lista de tuplas (ano inicial, ano final) de cada bloco.
+    """
+    return [
+        (year, min(year + chunk_years - 1, end_year))
+        for year in range(start_year, end_year + 1, chunk_years)
+    ]
+
+async def backfill_worker(jobs, frames, session, stats):
+    """
+    Etapa de extração da carga histórica: consome blocos e publica os DataFrames transformados.
+
+    Blocos sem dados são marcados como concluídos; blocos com falha na extração ou na
+    transformação são marcados como 'failed' para serem repetidos na próxima execução.
+
+    Args:
+        jobs (asyncio.Queue): Fila de tuplas (jobId, municipioId, anoInicio, anoFim).
+        frames (asyncio.Queue): Fila limitada de tuplas ((jobId, linhas), DataFrame) para a etapa de carga.
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada.
+        stats (StageStats): Contadores da etapa de extração.
+    """
+    while True:
+        try:
+            job_id, ibge_code, start_year, end_year = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        await asyncio.to_thread(update_backfill_jobs, [job_id], 'in_progress')
+        start = time.perf_counter()
+        data = await get_data_infoDengue(ibge_code, start_year, end_year, session)
+        stats.busy += time.perf_counter() - start
+        stats.items += 1
+        if data is None:
+            await asyncio.to_thread(update_backfill_jobs, [job_id], 'failed', error='Falha na extração')
+            continue
+        if not data:
+            await asyncio.to_thread(update_backfill_jobs, [job_id], 'done', rows=0)
+            continue
+        dengue = await transform_data_infoDengue(data, ibge_code)
+        if dengue is None:
+            await asyncio.to_thread(update_backfill_jobs, [job_id], 'failed', error='Falha na transformação')
+            continue
+        stats.rows += len(dengue)
+        # O número de linhas acompanha o bloco até a carga, para ser registrado quando ele for concluído
+        await frames.put(((job_id, len(dengue)), dengue))
+
+async def mark_loaded(jobs, success):
+    """
+    Registra o resultado da carga de um lote de blocos na tabela de controle.
+
+    Args:
+        jobs (list): Tuplas (jobId, linhas) dos blocos carregados no lote.
+        success (bool): Resultado da carga.
+    """
+    rows = dict(jobs)
+    if success:
+        await asyncio.to_thread(update_backfill_jobs, list(rows), 'done', rows=rows)
+    else:
+        await asyncio.to_thread(update_backfill_jobs, list(rows), 'failed', error='Falha na carga')
+
+async def backfill(start_year, end_year, chunk_years, max_attempts):
+    """
+    Executa a carga histórica dos dados da Info Dengue de forma retomável.
+
+    O espaço (município x anos) é dividido em blocos registrados na tabela backfillJobs.
+    Blocos concluídos não são buscados novamente; blocos interrompidos ou com falha são
+    repetidos até max_attempts tentativas.
+
+    Args:
+        start_year (int): Ano inicial da carga histórica.
+        end_year (int): Ano final da carga histórica.
+        chunk_years (int): Número de anos por bloco.
+        max_attempts (int): Número máximo de tentativas por bloco.
+    """
+    started_at = datetime.now()
+    init_db()
+    ranges = year_ranges(start_year, end_year, chunk_years)
+
+    async with create_http_session() as session:
+        municipioIds = get_municipioId_municipiosIBGE()
+        if not municipioIds:
+            await pipeline_municipiosIBGE(session)
+            municipioIds = get_municipioId_municipiosIBGE() or []
+
+        plan_backfill_jobs(municipioIds, ranges)
+        pending = get_pending_backfill_jobs(ranges, max_attempts)
+        logging.info(f'Carga histórica de {start_year} até {end_year}: {len(pending)} blocos pendentes.')
+
+        jobs = asyncio.Queue()
+        for job in pending:
+            jobs.put_nowait(job)
+        frames = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+        extract_stats, load_stats = StageStats('extração e transformação'), StageStats('carga')
+        start = time.perf_counter()
+        await run_stages(loader_infoDengue(frames, load_stats, mark_loaded), [
+            backfill_worker(jobs, frames, session, extract_stats)
+            for _ in range(PIPELINE_CONCURRENCY)
+        ], frames)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        extract_stats.report(elapsed)
+        load_stats.report(elapsed)
+        log_request_stats()
+
+    await finish_run('backfill', started_at)
+    shutdown_transform_executor()
+    await dispose_engines()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, filename="logs/backfill.log", filemode='a', format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
+    parser = argparse.ArgumentParser(description='Carga histórica retomável dos dados da Info Dengue.')
+    parser.add_argument('--start-year', type=int, default=2010, help='Ano inicial da carga (padrão: 2010).')
+    parser.add_argument('--end-year', type=int, default=date.today().year, help='Ano final da carga (padrão: ano atual).')
+    parser.add_argument('--chunk-years', type=int, default=3, help='Número de anos por bloco (padrão: 3).')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Número máximo de tentativas por bloco (padrão: 3).')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Orçamento global de requisições por segundo (padrão: HTTP_MAX_REQUESTS_PER_SECOND).')
+    parser.add_argument('--transform-executor', choices=['inline', 'thread', 'process'], default=None,
+                        help='Onde as transformações são executadas (padrão: TRANSFORM_EXECUTOR).')
+    parser.add_argument('--transform-workers', type=int, default=None,
+                        help='Número de workers do pool de transformações (padrão: TRANSFORM_WORKERS).')
+    args = parser.parse_args()
+    configure_transform_executor(args.transform_executor, args.transform_workers)
+    if args.rate is not None:
+        rate_limiter.set_rate(args.rate)
+    asyncio.run(backfill(args.start_year, args.end_year, args.chunk_years, args.max_attempts))
@@ -0,0 +1,273 @@
+import threading
+import hashlib
+import logging
+import json
+import gzip
+import time
+import os
+
+class ResponseCache:
+    """
+    Cache local em disco das respostas das APIs, endereçado pelo conteúdo da requisição.
+
+    Cada resposta é armazenada comprimida (gzip) em um arquivo cujo nome é o hash SHA-256
+    da URL e dos parâmetros, acompanhada de um arquivo de metadados com o horário de
+    armazenamento e os cabeçalhos ETag e Last-Modified usados na revalidação. Quando o
+    tamanho total ultrapassa o limite, as respostas usadas há mais tempo são removidas (LRU).
+
+    Os métodos fazem E/S bloqueante e são chamados em threads (asyncio.to_thread); o índice
+    de tamanhos e últimos usos é protegido por um lock.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index = None  # {chave: (tamanho em bytes, último uso)}, carregado sob demanda
+        self._lock = threading.Lock()  # Protege self._index
+
+    @staticmethod
+    def key(url, params=None):
+        """
+        Calcula a chave de cache de uma requisição.
+
+        Args:
+            url (str): A URL do endpoint da API.
+            params (dict, optional): Parâmetros da requisição GET.
+
+        Returns:
+            str: Hash SHA-256 da URL e dos parâmetros ordenados.
+        """
+        content = json.dumps([url, sorted((str(k), str(v)) for k, v in (params or {}).items())])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.json.gz', base + '.meta.json'
+
+    def _load_index(self):
+        # Deve ser chamado com self._lock adquirido
+        if self._index is None:
+            self._index = {}
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith('.json.gz'):
+                        stat = os.stat(os.path.join(root, name))
+                        self._index[name[:-len('.json.gz')]] = (stat.st_size, stat.st_mtime)
+        return self._index
+
+    def get_meta(self, key):
+        """
+        Obtem os metadados de uma resposta armazenada, sem ler o seu corpo.
+
+        Args:
+            key (str): Chave de cache da requisição.
+
+        Returns:
+            dict or None: Metadados da resposta ou None se a chave não estiver em cache.
+        """
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def iter_body(self, key, chunk_size=64 * 1024):
+        """
+        Lê o corpo de uma resposta armazenada em blocos descomprimidos, sem carregá-lo inteiro na memória.
+
+        Args:
+            key (str): Chave de cache da requisição.
+            chunk_size (int, optional): Tamanho de cada bloco em bytes.
+
+        Yields:
+            bytes: Blocos do corpo da resposta.
+        """
+        body_path, _ = self._paths(key)
+        self._mark_used(key, body_path)
+        with gzip.open(body_path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def writer(self, key):
+        """
+        Abre a gravação incremental de uma resposta recebida em blocos.
+
+        Args:
+            key (str): Chave de cache da requisição.
+
+        Returns:
+            CacheWriter: Gravador da resposta.
+        """
+        return CacheWriter(self, key)
+
+    def _mark_used(self, key, body_path):
+        # Registra o uso para a política LRU
+        now = time.time()
+        try:
+            os.utime(body_path, (now, now))
+        except OSError:
+            return
+        with self._lock:
+            index = self._load_index()
+            if key in index:
+                index[key] = (index[key][0], now)
+
+    def _stored(self, key, body_path):
+        size = os.path.getsize(body_path)
+        with self._lock:
+            self._load_index()[key] = (size, time.time())
+            self._evict()
+
+    def get(self, key):
+        """
+        Obtem uma resposta armazenada.
+
+        Args:
+            key (str): Chave de cache da requisição.
+
+        Returns:
+            tuple or None: (corpo da resposta em bytes, metadados) ou None se a chave não estiver em cache.
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        self._mark_used(key, body_path)
+        return body, meta
+
+    def put(self, key, body, meta):
+        """
+        Armazena uma resposta e remove as mais antigas se o limite de tamanho for ultrapassado.
+
+        Args:
+            key (str): Chave de cache da requisição.
+            body (bytes): Corpo da resposta.
+            meta (dict): Metadados da resposta (stored_at, etag, last_modified).
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            # Escreve em arquivos temporários e os renomeia, para nunca deixar uma entrada incompleta
+            with gzip.open(body_path + '.tmp', 'wb', compresslevel=6) as f:
+                f.write(body)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(body_path + '.tmp', body_path)
+            os.replace(meta_path + '.tmp', meta_path)
+            self._stored(key, body_path)
+        except OSError as e:
+            logging.warning(f"Erro ao gravar resposta no cache {body_path}: {e}")
+
+    def touch(self, key, meta):
+        """
+        Atualiza os metadados de uma resposta revalidada pelo servidor (HTTP 304).
+
+        Args:
+            key (str): Chave de cache da requisição.
+            meta (dict): Metadados atualizados.
+        """
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(meta_path + '.tmp', meta_path)
+        except OSError as e:
+            logging.warning(f"Erro ao atualizar metadados do cache {meta_path}: {e}")
+
+    def discard(self, key):
+        """
+        Remove uma resposta do cache, por exemplo quando o seu corpo está corrompido.
+
+        Args:
+            key (str): Chave de cache da requisição.
+        """
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._load_index().pop(key, None)
+
+    def _evict(self):
+        # Deve ser chamado com self._lock adquirido
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            del index[key]
+            total -= size
+
+class CacheWriter:
+    """
+    Grava no cache, bloco a bloco, uma resposta recebida em streaming.
+
+    A entrada só passa a existir no cache após commit(); se a resposta for interrompida,
+    abort() descarta o arquivo temporário. Como a compressão e a gravação bloqueiam, os métodos
+    devem ser chamados fora do loop de eventos (asyncio.to_thread).
+    """
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.body_path, self.meta_path = cache._paths(key)
+        self._file = None
+        try:
+            os.makedirs(os.path.dirname(self.body_path), exist_ok=True)
+            self._file = gzip.open(self.body_path + '.tmp', 'wb', compresslevel=6)
+        except OSError as e:
+            logging.warning(f"Erro ao gravar resposta no cache {self.body_path}: {e}")
+
+    def write(self, chunk):
+        """
+        Grava um bloco do corpo da resposta.
+
+        Args:
+            chunk (bytes): Bloco do corpo da resposta.
+        """
+        if self._file is not None:
+            self._file.write(chunk)
+
+    def commit(self, meta):
+        """
+        Conclui a gravação e publica a entrada no cache.
+
+        Args:
+            meta (dict): Metadados da resposta (stored_at, etag, last_modified).
+        """
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            self._file = None
+            with open(self.meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(self.body_path + '.tmp', self.body_path)
+            os.replace(self.meta_path + '.tmp', self.meta_path)
+            self.cache._stored(self.key, self.body_path)
+        except OSError as e:
+            logging.warning(f"Erro ao gravar resposta no cache {self.body_path}: {e}")
+
+    def abort(self):
+        """
+        Descarta a gravação incompleta.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self.body_path + '.tmp')
+        except OSError:
+            pass
@@ -1,42 +1,484 @@
+import numpy as np
 import aiohttp
+import asyncio
 import logging
-from datetime import date
+import codecs
+import zlib
+import random
+import json
+import time
+import re
+import os
+from array import array
+from math import nan as NAN
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from cache import ResponseCache
+from metrics import metrics
 
-async def extract_api_data(url, params=None):
+# Carrega as variáveis de ambiente a partir do arquivo .env
+load_dotenv()
+
+# Endereços base das APIs (podem apontar para o servidor simulado dos benchmarks)
+IBGE_API_URL = os.environ.get('IBGE_API_URL', 'https://servicodados.ibge.gov.br/api/v1').rstrip('/')
+INFODENGUE_API_URL = os.environ.get('INFODENGUE_API_URL', 'https://info.dengue.mat.br/api').rstrip('/')
+
+# Configuração do cliente HTTP compartilhado
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))  # Limite total de conexões abertas
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 20))  # Limite de conexões por host
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', 30))  # Tempo (s) que uma conexão ociosa fica aberta
+HTTP_DNS_CACHE_TTL = int(os.environ.get('HTTP_DNS_CACHE_TTL', 300))  # Tempo (s) de cache das resoluções de DNS
+HTTP_MAX_REQUESTS_PER_SECOND = float(os.environ.get('HTTP_MAX_REQUESTS_PER_SECOND', 0))  # Orçamento global de requisições (0 = sem limite)
+
+# Tempos limite das requisições
+HTTP_TIMEOUT_TOTAL = float(os.environ.get('HTTP_TIMEOUT_TOTAL', 60))  # Tempo máximo (s) de cada tentativa
+HTTP_TIMEOUT_CONNECT = float(os.environ.get('HTTP_TIMEOUT_CONNECT', 10))  # Tempo máximo (s) para abrir a conexão
+HTTP_TIMEOUT_SOCK_READ = float(os.environ.get('HTTP_TIMEOUT_SOCK_READ', 30))  # Tempo máximo (s) sem receber dados
+HTTP_RETRY_TOTAL_TIMEOUT = float(os.environ.get('HTTP_RETRY_TOTAL_TIMEOUT', 300))  # Tempo máximo (s) somando todas as tentativas
+
+# Novas tentativas com backoff exponencial e jitter
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 4))  # Novas tentativas após a primeira falha
+HTTP_BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', 0.5))  # Espera (s) base do backoff
+HTTP_BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', 30))  # Espera (s) máxima entre tentativas
+HTTP_RETRY_STATUS = {429, 500, 502, 503, 504}  # Códigos HTTP considerados transitórios
+
+# Circuito que pausa as requisições a um host degradado
+HTTP_CIRCUIT_THRESHOLD = int(os.environ.get('HTTP_CIRCUIT_THRESHOLD', 10))  # Falhas consecutivas que abrem o circuito
+HTTP_CIRCUIT_COOLDOWN = float(os.environ.get('HTTP_CIRCUIT_COOLDOWN', 30))  # Tempo (s) de pausa com o circuito aberto
+
+# Contadores das requisições da execução
+request_stats = {'requests': 0, 'retried': 0, 'failed': 0}
+
+def backoff_delay(attempt):
+    """
+    Calcula a espera antes de uma nova tentativa usando backoff exponencial com jitter completo.
+
+    Args:
+        attempt (int): Número da tentativa que falhou, começando em zero.
+
+    Returns:
+        float: Espera em segundos.
+    """
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+def parse_retry_after(value):
+    """
+    Interpreta o cabeçalho Retry-After, em segundos ou como data HTTP.
+
+    Args:
+        value (str or None): Valor do cabeçalho.
+
+    Returns:
+        float or None: Espera em segundos (limitada a HTTP_BACKOFF_MAX) ou None se ausente ou inválido.
+    """
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0), HTTP_BACKOFF_MAX)
+
+class CircuitBreaker:
+    """
+    Circuito que pausa as requisições a um host após falhas consecutivas.
+
+    Após HTTP_CIRCUIT_THRESHOLD falhas seguidas o circuito abre e todas as requisições ao host
+    aguardam HTTP_CIRCUIT_COOLDOWN segundos antes de tentar novamente.
+    """
+    def __init__(self, host, threshold, cooldown):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+    async def wait(self):
+        """
+        Aguarda o fechamento do circuito, se ele estiver aberto.
+        """
+        delay = self.open_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def success(self):
+        """
+        Registra uma requisição bem-sucedida, zerando as falhas consecutivas.
+        """
+        self.failures = 0
+
+    def failure(self):
+        """
+        Registra uma falha transitória e abre o circuito ao atingir o limite.
+        """
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.failures = 0
+            self.open_until = time.monotonic() + self.cooldown
+            logging.warning(f"Circuito aberto para {self.host}: requisições pausadas por {self.cooldown:.0f}s.")
+
+circuit_breakers = {}
+
+def get_circuit_breaker(url):
+    """
+    Retorna o circuito compartilhado do host de uma URL.
+
+    Args:
+        url (str): A URL do endpoint da API.
+
+    Returns:
+        CircuitBreaker: Circuito do host.
+    """
+    host = urlsplit(url).netloc
+    if host not in circuit_breakers:
+        circuit_breakers[host] = CircuitBreaker(host, HTTP_CIRCUIT_THRESHOLD, HTTP_CIRCUIT_COOLDOWN)
+    return circuit_breakers[host]
+
+class RateLimiter:
+    """
+    Limita a taxa global de requisições, espaçando-as igualmente no tempo.
+    """
+    def __init__(self, rate):
+        self.set_rate(rate)
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    def set_rate(self, rate):
+        """
+        Altera a taxa máxima de requisições.
+
+        Args:
+            rate (float): Requisições por segundo. Zero ou negativo desativa o limite.
+        """
+        self.interval = 1 / rate if rate > 0 else 0
+
+    async def wait(self):
+        """
+        Aguarda até que a próxima requisição esteja dentro do orçamento.
+        """
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+# Orçamento de requisições compartilhado por todas as chamadas de extract_api_data
+rate_limiter = RateLimiter(HTTP_MAX_REQUESTS_PER_SECOND)
+
+# Tamanho (bytes) dos blocos lidos das respostas interpretadas em streaming
+HTTP_STREAM_CHUNK_SIZE = int(os.environ.get('HTTP_STREAM_CHUNK_SIZE', 64 * 1024))
+
+# Campos da API da Info Dengue usados por transform_data_infoDengue
+INFODENGUE_FIELDS = [
+    'SE', 'id', 'casos_est', 'casos_est_min', 'casos_est_max', 'casos', 'p_rt1', 'p_inc100k', 'nivel',
+    'Rt', 'pop', 'tempmin', 'tempmed', 'tempmax', 'umidmin', 'umidmed', 'umidmax',
+    'receptivo', 'transmissao', 'nivel_inc', 'notif_accum_year'
+]
+
+# Configuração do cache local de respostas
+HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', '.cache/http')  # Diretório do cache
+HTTP_CACHE_MAX_MB = float(os.environ.get('HTTP_CACHE_MAX_MB', 512))  # Tamanho máximo do cache em MB
+HTTP_CACHE_TTL_IBGE = float(os.environ.get('HTTP_CACHE_TTL_IBGE', 30 * 24 * 3600))  # Validade (s) da lista de municípios
+HTTP_CACHE_TTL_INFODENGUE = float(os.environ.get('HTTP_CACHE_TTL_INFODENGUE', 6 * 3600))  # Validade (s) de consultas do ano atual
+
+response_cache = ResponseCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB * 1024 * 1024) if HTTP_CACHE_ENABLED else None
+
+def create_http_session():
+    """
+    Cria uma sessão HTTP compartilhada com um pool de conexões configurado.
+
+    A sessão reaproveita conexões (keep-alive) e resoluções de DNS entre as requisições,
+    evitando um novo handshake TCP/TLS a cada chamada. Deve ser usada como gerenciador de
+    contexto assíncrono durante toda a execução do pipeline.
+
+    Returns:
+        aiohttp.ClientSession: Sessão HTTP com o conector configurado.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_MAX_CONNECTIONS,
+        limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=HTTP_TIMEOUT_TOTAL,
+        connect=HTTP_TIMEOUT_CONNECT,
+        sock_read=HTTP_TIMEOUT_SOCK_READ
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+class ColumnarJSONParser:
+    """
+    Interpreta incrementalmente um array JSON de objetos, guardando apenas os campos pedidos em colunas.
+
+    O corpo da resposta é recebido em blocos de bytes; cada objeto é decodificado assim que chega
+    e os seus campos são acrescentados a arrays float64 contíguos (um por campo). Assim, nem o corpo
+    inteiro nem a lista de dicionários ficam na memória: o pico é o tamanho das colunas mais um bloco.
+    Valores nulos ou não numéricos viram NaN.
+    """
+    _whitespace = re.compile(r'\s*')
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = {field: array('d') for field in fields}
+        self.rows = 0
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._state = 'start'  # start -> value -> separator -> ... -> end
+
+    def feed(self, chunk):
+        """
+        Processa um bloco do corpo da resposta.
+
+        Args:
+            chunk (bytes): Bloco do corpo da resposta.
+        """
+        self._buffer += self._text.decode(chunk)
+        buffer, pos = self._buffer, 0
+        while True:
+            pos = self._whitespace.match(buffer, pos).end()
+            if pos == len(buffer) or self._state == 'end':
+                break
+            if self._state == 'start':
+                if buffer[pos] != '[':
+                    raise ValueError('A resposta não é um array JSON.')
+                pos += 1
+                self._state = 'first'
+            elif self._state in ('first', 'value'):
+                if self._state == 'first' and buffer[pos] == ']':
+                    pos += 1
+                    self._state = 'end'
+                    continue
+                try:
+                    obj, pos = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # Objeto incompleto: aguarda o próximo bloco
+                self._append(obj)
+                self._state = 'separator'
+            elif self._state == 'separator':
+                if buffer[pos] == ',':
+                    self._state = 'value'
+                elif buffer[pos] == ']':
+                    self._state = 'end'
+                else:
+                    raise ValueError(f'Caractere inesperado no array JSON: {buffer[pos]!r}')
+                pos += 1
+        self._buffer = buffer[pos:]
+
+    def _append(self, obj):
+        if not isinstance(obj, dict):
+            raise ValueError('O array JSON deve conter apenas objetos.')
+        for field, column in self.columns.items():
+            value = obj.get(field)
+            try:
+                column.append(NAN if value is None else value)
+            except TypeError:
+                column.append(NAN)
+        self.rows += 1
+
+    def result(self):
+        """
+        Retorna as colunas interpretadas.
+
+        Returns:
+            dict or list: Dicionário {campo: np.ndarray float64} ou lista vazia se o array não tiver objetos.
+        """
+        if self._state != 'end':
+            raise ValueError('A resposta JSON terminou de forma inesperada.')
+        if not self.rows:
+            return []
+        return {field: np.frombuffer(column, dtype='float64') for field, column in self.columns.items()}
+
+def _decode_chunks(chunks, fields=None):
+    """
+    Decodifica o corpo de uma resposta recebido em blocos.
+
+    Args:
+        chunks (iterable): Blocos de bytes do corpo da resposta.
+        fields (list, optional): Campos a serem extraídos em colunas. Se não for informado, o corpo
+            inteiro é decodificado com json.loads.
+
+    Returns:
+        dict or list: Os dados da resposta.
+    """
+    if fields is None:
+        return json.loads(b''.join(chunks))
+    parser = ColumnarJSONParser(fields)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.result()
+
+def _read_cached(key, fields=None):
+    """
+    Lê e decodifica uma resposta do cache local em blocos.
+
+    Uma entrada ausente, truncada ou corrompida é removida do cache, para ser baixada e gravada novamente.
+
+    Returns:
+        dict or list or None: Os dados da resposta ou None se a entrada não puder ser lida.
+    """
+    try:
+        return _decode_chunks(response_cache.iter_body(key), fields)
+    except (OSError, ValueError, EOFError, zlib.error) as e:
+        logging.warning(f"Entrada do cache local {key} ignorada: {e}")
+        response_cache.discard(key)
+        return None
+
+async def extract_api_data(url, params=None, session=None, cache_ttl=0, fields=None):
     """
     Extrai dados de um endpoint de API de forma assíncrona.
 
     Esta função envia uma requisição GET assíncrona para a URL especificada com os parâmetros fornecidos
-    e retorna os dados da resposta em JSON se a requisição for bem-sucedida. Se a requisição
-    falhar, ela registra um erro crítico com o código de status.
+    e retorna os dados da resposta em JSON se a requisição for bem-sucedida. Falhas transitórias
+    (HTTP 429/5xx, erros de conexão e timeouts) são repetidas com backoff exponencial e jitter,
+    respeitando o cabeçalho Retry-After. Se a requisição falhar definitivamente, ela registra um
+    erro crítico com o código de status.
 
     Args:
         url (str): A URL do endpoint da API.
         params (dict): Um dicionário de parâmetros a serem enviados com a requisição GET.
+        session (aiohttp.ClientSession, optional): Sessão HTTP compartilhada. Se não for informada,
+            uma sessão temporária é criada apenas para esta requisição.
+        cache_ttl (float, optional): Validade em segundos da resposta no cache local. Zero (padrão)
+            desativa o cache e float('inf') mantém a resposta até ser removida pelo limite de tamanho.
+            Respostas vencidas são revalidadas com If-None-Match/If-Modified-Since quando possível.
+        fields (list, optional): Se informado, a resposta (um array de objetos) é interpretada em
+            streaming e apenas estes campos são retornados, em colunas float64 (ver ColumnarJSONParser).
 
     Returns:
         dict or None: Os dados da resposta em JSON se a requisição for bem-sucedida, None se falhar.
     """
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                response.raise_for_status()  # Lança uma exceção para erros HTTP
-                logging.info(f"Dados da API {response.url} extraídos com sucesso.")
-                return await response.json()
-        except aiohttp.ClientResponseError as e:
-            logging.critical(f"Erro de resposta ao extrair dados da API {url}: {e}")
-        except aiohttp.ClientConnectionError as e:
-            logging.critical(f"Erro de conexão ao extrair dados da API {url}: {e}")
-        except aiohttp.ClientTimeout as e:
-            logging.critical(f"Timeout ao extrair dados da API {url}: {e}")
-        except Exception as e:
-            if isinstance(e, BaseException):
-                logging.critical(f"Erro desconhecido ao extrair dados da API {url}: {e}")
-            else:
+    if session is None:
+        async with create_http_session() as session:
+            return await extract_api_data(url, params, session, cache_ttl, fields)
+    else:
+        key, meta, headers = None, None, {}
+        host = urlsplit(url).netloc
+        if response_cache is not None and cache_ttl:
+            key = response_cache.key(url, params)
+            meta = await asyncio.to_thread(response_cache.get_meta, key)
+            if meta and time.time() - meta['stored_at'] < cache_ttl:
+                data = await asyncio.to_thread(_read_cached, key, fields)
+                if data is not None:
+                    metrics.inc('http_cache_total', host=host, result='hit')
+                    logging.info(f"Dados da API {url} obtidos do cache local.")
+                    return data
+                meta = None
+            if meta:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+        breaker = get_circuit_breaker(url)
+        deadline = time.monotonic() + HTTP_RETRY_TOTAL_TIMEOUT
+        attempt = 0
+        while True:
+            await breaker.wait()
+            await rate_limiter.wait()
+            request_stats['requests'] += 1
+            retry_after = None
+            attempt_start = time.perf_counter()
+            try:
+                async with session.get(url, params=params, headers=headers) as response:
+                    metrics.inc('http_responses_total', host=host, status=response.status)
+                    if response.status == 304 and meta:
+                        breaker.success()
+                        data = await asyncio.to_thread(_read_cached, key, fields)
+                        if data is not None:
+                            meta['stored_at'] = time.time()
+                            await asyncio.to_thread(response_cache.touch, key, meta)
+                            metrics.inc('http_cache_total', host=host, result='revalidated')
+                            logging.info(f"Dados da API {response.url} revalidados no cache local.")
+                            return data
+                        # A entrada sumiu do cache: o servidor respondeu corretamente, então a requisição é
+                        # repetida imediatamente sem revalidação, sem contar falha no circuito nem tentativa
+                        logging.warning(f"Resposta 304 da API {url} sem entrada no cache local; repetindo sem revalidação.")
+                        headers, meta = {}, None
+                        continue
+                    if response.status in HTTP_RETRY_STATUS:
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    response.raise_for_status()  # Lança uma exceção para erros HTTP
+                    new_meta = {
+                        'url': str(response.url),
+                        'stored_at': time.time(),
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')
+                    }
+                    if fields is None:
+                        body = await response.read()
+                        metrics.inc('http_bytes_total', len(body), host=host)
+                        data = json.loads(body)
+                        if key is not None:
+                            await asyncio.to_thread(response_cache.put, key, body, new_meta)
+                    else:
+                        # Interpreta o corpo em streaming, gravando-o no cache bloco a bloco.
+                        # A compressão e a gravação rodam em threads, fora do loop de eventos
+                        parser = ColumnarJSONParser(fields)
+                        writer = await asyncio.to_thread(response_cache.writer, key) if key is not None else None
+                        try:
+                            async for chunk in response.content.iter_chunked(HTTP_STREAM_CHUNK_SIZE):
+                                parser.feed(chunk)
+                                metrics.inc('http_bytes_total', len(chunk), host=host)
+                                if writer is not None:
+                                    await asyncio.to_thread(writer.write, chunk)
+                            data = parser.result()
+                            if writer is not None:
+                                await asyncio.to_thread(writer.commit, new_meta)
+                        finally:
+                            if writer is not None:
+                                await asyncio.to_thread(writer.abort)
+                    breaker.success()
+                    logging.info(f"Dados da API {response.url} extraídos com sucesso.")
+                    return data
+            except aiohttp.ClientResponseError as e:
+                if e.status not in HTTP_RETRY_STATUS:
+                    logging.critical(f"Erro de resposta ao extrair dados da API {url}: {e}")
+                    break
+                error = f"Erro de resposta ao extrair dados da API {url}: {e}"
+            except aiohttp.ClientError as e:
+                error = f"Erro de conexão ao extrair dados da API {url}: {e}"
+            except asyncio.TimeoutError:
+                error = f"Timeout ao extrair dados da API {url}"
+            except Exception as e:
                 logging.critical(f"Erro inesperado ao extrair dados da API {url}: {e}")
+                break
+            finally:
+                metrics.observe('http_request_seconds', time.perf_counter() - attempt_start, host=host)
+            # Falha transitória: registra no circuito e tenta novamente após o backoff
+            breaker.failure()
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            if attempt == HTTP_MAX_RETRIES or time.monotonic() + delay > deadline:
+                logging.critical(f"{error} (após {attempt + 1} tentativas)")
+                break
+            request_stats['retried'] += 1
+            metrics.inc('http_retries_total', host=host)
+            logging.warning(f"{error}. Nova tentativa em {delay:.1f}s.")
+            await asyncio.sleep(delay)
+            attempt += 1
+        request_stats['failed'] += 1
+        metrics.inc('http_failures_total', host=host)
         return None
 
-async def get_data_municipiosIBGE():
+def log_request_stats():
+    """
+    Registra no log o total de requisições, novas tentativas e falhas da execução.
+    """
+    logging.info(
+        f"Requisições HTTP: {request_stats['requests']}, novas tentativas: {request_stats['retried']}, "
+        f"falhas definitivas: {request_stats['failed']}."
+    )
+
+async def get_data_municipiosIBGE(session=None):
     """
     Busca dados dos municípios brasileiros a partir da API do IBGE de forma assíncrona.
 
@@ -44,18 +486,22 @@ async def get_data_municipiosIBGE():
     e retorna os dados da resposta em JSON se a requisição for bem-sucedida. Se a requisição falhar,
     um erro será registrado.
 
+    Args:
+        session (aiohttp.ClientSession, optional): Sessão HTTP compartilhada.
+
     Returns:
         dict or None: Os dados da resposta em JSON se a requisição for bem-sucedida, None se falhar.
     """
-    urlIBGE = "https://servicodados.ibge.gov.br/api/v1/localidades/municipios"
-    json_data = await extract_api_data(urlIBGE)
+    urlIBGE = f"{IBGE_API_URL}/localidades/municipios"
+    with metrics.track('extract', endpoint='municipiosIBGE'):
+        json_data = await extract_api_data(urlIBGE, session=session, cache_ttl=HTTP_CACHE_TTL_IBGE)
     if json_data:
         logging.info("Dados do IBGE extraídos com sucesso.")
     else:
         logging.error("Falha ao obter dados do IBGE.")
     return json_data
 
-async def get_data_infoDengue(ibge_code, start_year=date.today().year, end_year=date.today().year):
+async def get_data_infoDengue(ibge_code, start_year=date.today().year, end_year=date.today().year, session=None, start_week=1, end_week=53):
     """
     Busca dados de incidência de dengue de um município brasileiro a partir da API Info Dengue de forma assíncrona.
     Esta função utiliza a função extract_api_data para enviar uma requisição GET para a URL da API Info Dengue
@@ -66,6 +512,9 @@ async def get_data_infoDengue(ibge_code, start_year=date.today().year, end_year=
         ibge_code (str): Código do município do IBGE.
         start_year (int, optional): Ano inicial da consulta (padrão é 2 anos atrás do ano atual).
         end_year (int, optional): Ano final da consulta (padrão é o ano atual).
+        session (aiohttp.ClientSession, optional): Sessão HTTP compartilhada.
+        start_week (int, optional): Semana epidemiológica inicial do ano inicial (padrão é 1).
+        end_week (int, optional): Semana epidemiológica final do ano final (padrão é 53).
 
     Returns:
         dict or None: Os dados da resposta em JSON se a requisição for bem-sucedida, None se falhar.
@@ -74,15 +523,18 @@ async def get_data_infoDengue(ibge_code, start_year=date.today().year, end_year=
         'geocode': ibge_code,
         'disease': 'dengue',
         'format': 'json',
-        'ew_start': '01',
+        'ew_start': f'{start_week:02d}',
         'ey_start': start_year,
-        'ew_end': '53',
+        'ew_end': f'{end_week:02d}',
         'ey_end': end_year
     }
-    urlInfoDengue = "https://info.dengue.mat.br/api/alertcity/"
-    json_data = await extract_api_data(urlInfoDengue, params)
+    urlInfoDengue = f"{INFODENGUE_API_URL}/alertcity/"
+    # Consultas encerradas em anos anteriores não mudam mais e nunca vencem no cache
+    cache_ttl = float('inf') if end_year < date.today().year else HTTP_CACHE_TTL_INFODENGUE
+    with metrics.track('extract', endpoint='infoDengue'):
+        json_data = await extract_api_data(urlInfoDengue, params, session, cache_ttl, fields=INFODENGUE_FIELDS)
     if json_data:
-        logging.info(f"Dados de dengue do município: {ibge_code}, período de: {start_year} até {end_year}.")
+        logging.info(f"Dados de dengue do município: {ibge_code}, período de: {start_week:02d}/{start_year} até {end_week:02d}/{end_year}.")
     else:
-        logging.error(f"Falha ao obter dados de dengue do município: {ibge_code}, período de: {start_year} até {end_year}.")
+        logging.error(f"Falha ao obter dados de dengue do município: {ibge_code}, período de: {start_week:02d}/{start_year} até {end_week:02d}/{end_year}.")
     return json_data
\ No newline at end of file
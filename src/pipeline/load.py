@@ -1,6 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, BigInteger, ForeignKey
+from sqlalchemy import create_engine, func, select, update, delete, case, cast, tuple_, Column, Integer, SmallInteger, String, Float, BigInteger, DateTime, ForeignKey, UniqueConstraint, Index, text, literal_column
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.dialects.postgresql import insert, array_agg, aggregate_order_by, ARRAY
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from dotenv import load_dotenv
+import pandas as pd
+import asyncio
 import logging
 import os
 
@@ -14,14 +20,58 @@ DB_NAME = os.environ['DB_NAME']  # Nome do banco de dados
 DB_USER = os.environ['DB_USER']  # Nome do usuário
 DB_PASS = os.environ['DB_PASS']  # Senha do usuário
 
+# Configuração do pool de conexões
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # Conexões mantidas abertas no pool
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))  # Conexões extras permitidas além do pool
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'  # Testa a conexão antes de usá-la
+
+# Backend das cargas do pipeline: 'sync' (psycopg2 em um pool de threads dedicado) ou 'async' (asyncpg)
+DB_BACKEND = os.environ.get('DB_BACKEND', 'sync').lower()
+DB_WRITER_THREADS = int(os.environ.get('DB_WRITER_THREADS', DB_POOL_SIZE))  # Threads de escrita do backend 'sync'
+
+# Particiona a tabela infoDengue por ano (PARTITION BY RANGE). Bancos existentes devem ser convertidos com migrate.py
+DB_PARTITION_BY_YEAR = os.environ.get('DB_PARTITION_BY_YEAR', 'false').lower() == 'true'
+INFODENGUE_FIRST_YEAR = 2010  # Primeiro ano com partição própria; anos sem partição vão para infoDengue_default
+
+# Número de chaves (município, ano) recalculadas por comando na atualização das tabelas de resumo
+SUMMARY_REFRESH_BATCH = int(os.environ.get('SUMMARY_REFRESH_BATCH', 1000))
+
+# Número de linhas enviadas por comando INSERT nas cargas em lote
+LOAD_BATCH_SIZE = int(os.environ.get('LOAD_BATCH_SIZE', 1000))
+
+# Tipos das colunas da junção de infoDengue e municipiosIBGE lida em DataFrames (iter_infoDengue_municipios),
+# os mesmos tipos compactos usados pelo pipeline
+INFODENGUE_MUNICIPIOS_DTYPES = {
+    'municipioId': 'int32', 'municipioNome': 'object', 'estadoNome': 'object', 'estadoSigla': 'object',
+    'regiaoNome': 'object', 'regiaoSigla': 'object', 'infoDengueId': 'int64', 'ano': 'int16', 'semana': 'int16',
+    'semanaEpidemiologica': 'object', 'casosEstimados': 'float64', 'casosEstimadosMin': 'float64',
+    'casosEstimadosMax': 'float64', 'casosNotificados': 'float32', 'probabilidadeRtMaiorQueUm': 'float32',
+    'taxaIncidenciaPor100k': 'float32', 'nivelAlerta': 'float32', 'estimativaRt': 'float32',
+    'populacaoEstimada': 'float32', 'temperaturaMinMedia': 'float32', 'temperaturaMedMedia': 'float32',
+    'temperaturaMaxMedia': 'float32', 'umidadeMinMedia': 'float32', 'umidadeMedMedia': 'float32',
+    'umidadeMaxMedia': 'float32', 'indicadorReceptividadeClimatica': 'float32',
+    'evidenciaTransmissaoSustentada': 'float32', 'nivelIncidencia': 'float32', 'casosAcumuladosAno': 'float32'
+}
+
 # Configuração do SQLAlchemy
 Base = declarative_base()
 
+# Engines e fábricas de sessões compartilhados, criados sob demanda
+_engine = None
+_Session = None
+_async_engine = None
+_AsyncSession = None
+_db_executor = None
+
 class MunicipiosIBGE(Base):
     """
     Classe que define o modelo da tabela de municípios.
     """
     __tablename__ = 'municipiosIBGE'
+    __table_args__ = (
+        # Listas de municípios do estado e junção com infoDengue a partir do estado
+        Index('ix_municipiosIBGE_estadoSigla_municipioNome', 'estadoSigla', 'municipioNome'),
+    )
 
     municipioId = Column(Integer, primary_key=True)
     municipioNome = Column(String)
@@ -35,10 +85,18 @@ class InfoDengue(Base):
     Classe que define o modelo da tabela de informações de dengue.
     """
     __tablename__ = 'infoDengue'
+    __table_args__ = (
+        # Série semanal de um município em um ano (gráficos 1 a 4, carga incremental)
+        Index('ix_infoDengue_municipioId_ano_semana', 'municipioId', 'ano', 'semana'),
+        # Todos os municípios de um ano, combinado com ix_municipiosIBGE_estadoSigla_municipioNome (mapa de calor do estado)
+        Index('ix_infoDengue_ano_municipioId', 'ano', 'municipioId'),
+        {'postgresql_partition_by': 'RANGE (ano)'} if DB_PARTITION_BY_YEAR else {}
+    )
 
     infoDengueId = Column(BigInteger, primary_key=True)
     municipioId = Column(Integer, ForeignKey('municipiosIBGE.municipioId'))
-    ano = Column(Integer)
+    # Em tabelas particionadas a chave primária precisa conter a chave de partição
+    ano = Column(Integer, primary_key=DB_PARTITION_BY_YEAR)
     semana = Column(Integer)
     semanaEpidemiologica = Column(String)
     casosEstimados = Column(Float)
@@ -61,21 +119,347 @@ class InfoDengue(Base):
     nivelIncidencia = Column(Float)
     casosAcumuladosAno = Column(Float)
 
-def create_db_session():
+class BackfillJob(Base):
+    """
+    Classe que define o modelo da tabela de controle da carga histórica (backfill).
+
+    Cada linha é um bloco (município x intervalo de anos) com o seu status:
+    'pending', 'in_progress', 'done' ou 'failed'.
+    """
+    __tablename__ = 'backfillJobs'
+    __table_args__ = (UniqueConstraint('municipioId', 'anoInicio', 'anoFim'),)
+
+    jobId = Column(Integer, primary_key=True, autoincrement=True)
+    municipioId = Column(Integer, ForeignKey('municipiosIBGE.municipioId'))
+    anoInicio = Column(Integer)
+    anoFim = Column(Integer)
+    status = Column(String, default='pending')
+    tentativas = Column(Integer, default=0)
+    linhas = Column(Integer)
+    erro = Column(String)
+    atualizadoEm = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class PipelineRun(Base):
+    """
+    Classe que define o modelo da tabela de execuções do pipeline e da carga histórica.
+
+    O maior runId com linhas inseridas ou alteradas é a versão dos dados usada pelo dashboard para
+    invalidar os seus caches.
+    """
+    __tablename__ = 'pipelineRuns'
+
+    runId = Column(Integer, primary_key=True, autoincrement=True)
+    tipo = Column(String)
+    iniciadoEm = Column(DateTime)
+    concluidoEm = Column(DateTime, server_default=func.now())
+    linhas = Column(Integer)
+
+class ResumoPendente(Base):
+    """
+    Classe que define o modelo da tabela de municípios e anos cujas linhas de resumo ainda precisam ser recalculadas.
+
+    As chaves carregadas por uma execução ficam registradas aqui até o recálculo ser concluído, de modo
+    que uma falha na atualização dos resumos seja corrigida pela execução seguinte.
+    """
+    __tablename__ = 'resumosPendentes'
+
+    municipioId = Column(Integer, primary_key=True)
+    ano = Column(Integer, primary_key=True)
+
+class ResumoMunicipioAno(Base):
+    """
+    Tabela de resumo com os totais anuais de cada município (gráfico 6).
+    """
+    __tablename__ = 'resumoMunicipioAno'
+
+    municipioId = Column(Integer, ForeignKey('municipiosIBGE.municipioId'), primary_key=True)
+    ano = Column(Integer, primary_key=True)
+    casosNotificados = Column(Float)
+    casosEstimados = Column(Float)
+    semanas = Column(Integer)
+
+class ReceptividadeMunicipioAno(Base):
     """
-    Cria uma sessão do SQLAlchemy e conecta ao banco de dados.
+    Tabela de resumo com o indicador de receptividade climática semanal de cada município em um ano (gráfico 5).
+
+    Cada linha é uma linha do mapa de calor do estado: as semanas e os indicadores ficam em
+    vetores ordenados pela semana, de modo que a matriz de um estado é lida em poucas linhas.
+    """
+    __tablename__ = 'receptividadeMunicipioAno'
+    __table_args__ = (Index('ix_receptividadeMunicipioAno_estadoSigla_ano', 'estadoSigla', 'ano'),)
+
+    municipioId = Column(Integer, ForeignKey('municipiosIBGE.municipioId'), primary_key=True)
+    ano = Column(Integer, primary_key=True)
+    estadoSigla = Column(String)
+    municipioNome = Column(String)
+    semanas = Column(ARRAY(SmallInteger))
+    indicadores = Column(ARRAY(SmallInteger))
+
+class IncidenciaEstadoSemana(Base):
+    """
+    Tabela de resumo com os casos e a incidência semanal de cada estado.
+
+    A incidência de uma região é obtida somando os casos e a população dos seus estados.
+    """
+    __tablename__ = 'incidenciaEstadoSemana'
+    __table_args__ = (Index('ix_incidenciaEstadoSemana_regiaoNome_ano', 'regiaoNome', 'ano'),)
+
+    estadoSigla = Column(String, primary_key=True)
+    ano = Column(Integer, primary_key=True)
+    semana = Column(Integer, primary_key=True)
+    estadoNome = Column(String)
+    regiaoNome = Column(String)
+    semanaEpidemiologica = Column(String)
+    casosNotificados = Column(Float)
+    casosEstimados = Column(Float)
+    populacaoEstimada = Column(Float)
+    taxaIncidenciaPor100k = Column(Float)
+
+def get_engine():
+    """
+    Retorna o engine do SQLAlchemy compartilhado pelo processo.
+
+    O engine e o seu pool de conexões são criados na primeira chamada e reaproveitados
+    nas seguintes, evitando abrir um novo pool a cada sessão.
 
     Returns:
-        session (Session): Uma sessão do SQLAlchemy.
+        engine (Engine): Engine do SQLAlchemy.
     """
-    try:
+    global _engine, _Session
+    if _engine is None:
         db_url = f'postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-        engine = create_engine(db_url)
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        return Session()
+        _engine = create_engine(
+            db_url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING
+        )
+        _Session = sessionmaker(bind=_engine)
+    return _engine
+
+def init_db():
+    """
+    Cria as tabelas do banco de dados que ainda não existem.
+
+    Deve ser executada uma única vez na inicialização do pipeline ou do dashboard,
+    e não a cada sessão.
+    """
+    try:
+        Base.metadata.create_all(get_engine())
+        if DB_PARTITION_BY_YEAR:
+            with get_engine().begin() as connection:
+                create_infoDengue_partitions(connection)
     except Exception as e:
-        logging.error(f"Erro ao conectar ao banco de dados: {e}")
+        logging.error(f"Erro ao criar as tabelas do banco de dados: {e}")
+
+def infoDengue_is_partitioned(connection):
+    """
+    Verifica se a tabela infoDengue já é particionada.
+
+    Args:
+        connection (Connection): Conexão com o banco de dados.
+
+    Returns:
+        bool: True se a tabela for particionada.
+    """
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'infoDengue'"
+    )).first() is not None
+
+def create_infoDengue_partitions(connection, last_year=None):
+    """
+    Cria as partições anuais de infoDengue que ainda não existem, além da partição padrão.
+
+    As partições vão de INFODENGUE_FIRST_YEAR até o ano seguinte ao atual, para que a partição
+    padrão receba apenas anos inesperados.
+
+    Args:
+        connection (Connection): Conexão com o banco de dados.
+        last_year (int, optional): Último ano com partição própria (padrão é o ano seguinte ao atual).
+    """
+    if not infoDengue_is_partitioned(connection):
+        logging.error("A tabela infoDengue não é particionada: execute src/pipeline/migrate.py para convertê-la.")
+        return
+    last_year = last_year or date.today().year + 1
+    for year in range(INFODENGUE_FIRST_YEAR, last_year + 1):
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "infoDengue_{year}" PARTITION OF "infoDengue" FOR VALUES FROM ({year}) TO ({year + 1})'
+        ))
+    connection.execute(text('CREATE TABLE IF NOT EXISTS "infoDengue_default" PARTITION OF "infoDengue" DEFAULT'))
+
+def create_db_session():
+    """
+    Cria uma sessão do SQLAlchemy a partir do pool de conexões compartilhado.
+
+    A sessão pode ser usada como gerenciador de contexto (with), que a fecha e devolve
+    a conexão ao pool ao final do bloco.
+
+    Returns:
+        session (Session): Uma sessão do SQLAlchemy.
+    """
+    get_engine()
+    return _Session()
+
+def get_async_engine():
+    """
+    Retorna o engine assíncrono (asyncpg) compartilhado pelo processo.
+
+    Returns:
+        engine (AsyncEngine): Engine assíncrono do SQLAlchemy.
+    """
+    global _async_engine, _AsyncSession
+    if _async_engine is None:
+        db_url = f'postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+        _async_engine = create_async_engine(
+            db_url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING
+        )
+        _AsyncSession = async_sessionmaker(bind=_async_engine)
+    return _async_engine
+
+def create_async_db_session():
+    """
+    Cria uma sessão assíncrona do SQLAlchemy a partir do pool de conexões do asyncpg.
+
+    Returns:
+        session (AsyncSession): Uma sessão assíncrona do SQLAlchemy.
+    """
+    get_async_engine()
+    return _AsyncSession()
+
+async def dispose_engines():
+    """
+    Fecha as conexões dos pools e encerra o pool de threads de escrita.
+
+    Deve ser chamada ao final do pipeline, ainda dentro do loop de eventos.
+    """
+    global _db_executor
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
+
+def _dataframe_records(df, columns):
+    """
+    Converte as colunas de um DataFrame em uma lista de registros prontos para o banco de dados.
+
+    Args:
+        df (DataFrame): DataFrame de origem.
+        columns (list): Colunas a serem enviadas ao banco de dados.
+
+    Returns:
+        list: Lista de dicionários com tipos nativos do Python e valores nulos (NaN, NA) convertidos para None.
+    """
+    df = df[columns].copy()
+    for column in df.select_dtypes('float32').columns:
+        # Converte pela representação decimal mais curta, evitando que 0.95 vire 0.949999988079071
+        df[column] = df[column].astype(str).astype('float64')
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict('records')
+
+def _on_conflict_update_changed(stmt, table):
+    """
+    Completa um INSERT com ON CONFLICT DO UPDATE que só reescreve as linhas cujos valores mudaram.
+
+    Linhas idênticas às armazenadas não são atualizadas, evitando novas versões das tuplas,
+    escritas no WAL e trabalho do autovacuum a cada execução.
+    """
+    primary_keys = [column.name for column in table.primary_key.columns]
+    columns = [column.name for column in table.columns if column.name not in primary_keys]
+    return stmt.on_conflict_do_update(
+        index_elements=primary_keys,
+        set_={column: stmt.excluded[column] for column in columns},
+        where=tuple_(*[table.c[column] for column in columns]).is_distinct_from(
+            tuple_(*[stmt.excluded[column] for column in columns]))
+    )
+
+def upsert_dataframe(session, model, df, batch_size=LOAD_BATCH_SIZE, returning=()):
+    """
+    Insere ou atualiza em lote as linhas de um DataFrame usando INSERT ... ON CONFLICT DO UPDATE.
+
+    As linhas são enviadas em lotes de batch_size registros, cada lote em um único comando
+    INSERT com múltiplos VALUES, em vez de uma consulta e uma escrita por linha. Linhas já
+    armazenadas com os mesmos valores não são reescritas.
+
+    Args:
+        session (Session): Sessão do SQLAlchemy.
+        model (Base): Modelo da tabela de destino.
+        df (DataFrame): DataFrame com as colunas da tabela.
+        batch_size (int, optional): Número de linhas por comando INSERT.
+        returning (tuple, optional): Colunas retornadas das linhas inseridas ou atualizadas.
+
+    Returns:
+        dict: {'inserted': int, 'updated': int, 'unchanged': int, 'changed': [tupla das colunas de returning, ...]}.
+    """
+    table = model.__table__
+    primary_keys = [column.name for column in table.primary_key.columns]
+    columns = [column.name for column in table.columns]
+    # Um mesmo comando não pode atualizar a mesma linha duas vezes
+    df = df.drop_duplicates(subset=primary_keys, keep='last')
+    records = _dataframe_records(df, columns)
+    # Só as linhas inseridas ou atualizadas são retornadas; xmax = 0 identifica as que foram inseridas
+    stmt = _on_conflict_update_changed(insert(table), table).returning(
+        literal_column('xmax = 0').label('inserted'), *[table.c[column] for column in returning]
+    )
+    result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'changed': []}
+    for start in range(0, len(records), batch_size):
+        rows = session.execute(stmt, records[start:start + batch_size]).all()
+        inserted = sum(1 for row in rows if row[0])
+        result['inserted'] += inserted
+        result['updated'] += len(rows) - inserted
+        result['changed'].extend(tuple(row[1:]) for row in rows)
+    result['unchanged'] = len(records) - result['inserted'] - result['updated']
+    return result
+
+def _upsert_dataframe_sync(model, df, returning=()):
+    """
+    Executa upsert_dataframe em uma sessão própria, confirmando a transação ao final.
+    """
+    with create_db_session() as session:
+        try:
+            result = upsert_dataframe(session, model, df, returning=returning)
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+
+async def load_dataframe(model, df, returning=()):
+    """
+    Insere ou atualiza um DataFrame no banco de dados sem bloquear o loop de eventos.
+
+    Com DB_BACKEND='async' a carga usa uma sessão assíncrona sobre o asyncpg. Com
+    DB_BACKEND='sync' a carga com psycopg2 é executada em um pool de threads dedicado,
+    permitindo que as requisições HTTP continuem enquanto o banco de dados é escrito.
+
+    Args:
+        model (Base): Modelo da tabela de destino.
+        df (DataFrame): DataFrame com as colunas da tabela.
+        returning (tuple, optional): Colunas retornadas das linhas inseridas ou atualizadas.
+
+    Returns:
+        dict: Contagem de linhas inseridas, atualizadas e inalteradas (ver upsert_dataframe).
+    """
+    global _db_executor
+    if DB_BACKEND == 'async':
+        async with create_async_db_session() as session:
+            try:
+                result = await session.run_sync(upsert_dataframe, model, df, returning=returning)
+                await session.commit()
+                return result
+            except Exception:
+                await session.rollback()
+                raise
+    else:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=DB_WRITER_THREADS, thread_name_prefix='db-writer')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_db_executor, _upsert_dataframe_sync, model, df, returning)
 
 async def create_municipiosIBGE(df_municipios):
     """
@@ -90,37 +474,20 @@ async def create_municipiosIBGE(df_municipios):
             - estadoSigla (str)
             - regiaoNome (str)
             - regiaoSigla (str)
+
+    Returns:
+        dict or None: Contagem de linhas inseridas, atualizadas e inalteradas (ver upsert_dataframe) ou None se ocorrer um erro.
     """
-    session = create_db_session()
     try:
-        for index, row in df_municipios.iterrows():
-            municipio = session.query(MunicipiosIBGE).filter_by(municipioId=row['municipioId']).first()
-            # Se o município existir, atualiza os campos
-            if municipio:
-                # Atualiza os campos se o município já existir
-                municipio.municipioNome = row['municipioNome']
-                municipio.estadoNome = row['estadoNome']
-                municipio.estadoSigla = row['estadoSigla']
-                municipio.regiaoNome = row['regiaoNome']
-                municipio.regiaoSigla = row['regiaoSigla']
-            else:
-                # Insere um novo município se não existir
-                municipio = MunicipiosIBGE(
-                    municipioId=row['municipioId'],
-                    municipioNome=row['municipioNome'],
-                    estadoNome=row['estadoNome'],
-                    estadoSigla=row['estadoSigla'],
-                    regiaoNome=row['regiaoNome'],
-                    regiaoSigla=row['regiaoSigla']
-                )
-                session.add(municipio)
-        session.commit()
-        logging.info(f"{len(df_municipios)} municípios foram inseridos ou atualizados com sucesso!")
+        result = await load_dataframe(MunicipiosIBGE, df_municipios)
+        logging.info(
+            f"{len(df_municipios)} municípios carregados com sucesso: {result['inserted']} inseridos, "
+            f"{result['updated']} atualizados e {result['unchanged']} inalterados."
+        )
+        return result
     except Exception as e:
-        session.rollback()
         logging.error(f"Erro ao inserir ou atualizar municípios: {e}")
-    finally:
-        session.close()
+        return None
 
 async def create_infoDengue(df_infoDengue):
     """
@@ -153,108 +520,50 @@ async def create_infoDengue(df_infoDengue):
             - evidenciaTransmissaoSustentada (float)
             - nivelIncidencia (float)
             - casosAcumuladosAno (float)
+
+    Returns:
+        dict or None: Contagem de linhas inseridas, atualizadas e inalteradas e, em 'changed', os pares
+            (municipioId, ano) das linhas inseridas ou atualizadas (ver upsert_dataframe), ou None se ocorrer um erro.
     """
-    session = create_db_session()
     try:
-        for index, row in df_infoDengue.iterrows():
-            info_dengue = session.query(InfoDengue).filter_by(infoDengueId=row['infoDengueId']).first()
-            # Se o registro do info dengue existir, atualiza os campos
-            if info_dengue:
-                # Atualiza os campos se o registro de dengue já existir
-                info_dengue.municipioId = row['municipioId']
-                info_dengue.ano = row['ano']
-                info_dengue.semana = row['semana']
-                info_dengue.semanaEpidemiologica = row['semanaEpidemiologica']
-                info_dengue.casosEstimados = row['casosEstimados']
-                info_dengue.casosEstimadosMin = row['casosEstimadosMin']
-                info_dengue.casosEstimadosMax = row['casosEstimadosMax']
-                info_dengue.casosNotificados = row['casosNotificados']
-                info_dengue.probabilidadeRtMaiorQueUm = row['probabilidadeRtMaiorQueUm']
-                info_dengue.taxaIncidenciaPor100k = row['taxaIncidenciaPor100k']
-                info_dengue.nivelAlerta = row['nivelAlerta']
-                info_dengue.estimativaRt = row['estimativaRt']
-                info_dengue.populacaoEstimada = row['populacaoEstimada']
-                info_dengue.temperaturaMinMedia = row['temperaturaMinMedia']
-                info_dengue.temperaturaMedMedia = row['temperaturaMedMedia']
-                info_dengue.temperaturaMaxMedia = row['temperaturaMaxMedia']
-                info_dengue.umidadeMinMedia = row['umidadeMinMedia']
-                info_dengue.umidadeMedMedia = row['umidadeMedMedia']
-                info_dengue.umidadeMaxMedia = row['umidadeMaxMedia']
-                info_dengue.indicadorReceptividadeClimatica = row['indicadorReceptividadeClimatica']
-                info_dengue.evidenciaTransmissaoSustentada = row['evidenciaTransmissaoSustentada']
-                info_dengue.nivelIncidencia = row['nivelIncidencia']
-                info_dengue.casosAcumuladosAno = row['casosAcumuladosAno']
-            else:
-                # Insere um novo registro se não existir
-                info_dengue = InfoDengue(
-                    infoDengueId=row['infoDengueId'],
-                    municipioId=row['municipioId'],
-                    ano=row['ano'],
-                    semana=row['semana'],
-                    semanaEpidemiologica=row['semanaEpidemiologica'],
-                    casosEstimados=row['casosEstimados'],
-                    casosEstimadosMin=row['casosEstimadosMin'],
-                    casosEstimadosMax=row['casosEstimadosMax'],
-                    casosNotificados=row['casosNotificados'],
-                    probabilidadeRtMaiorQueUm=row['probabilidadeRtMaiorQueUm'],
-                    taxaIncidenciaPor100k=row['taxaIncidenciaPor100k'],
-                    nivelAlerta=row['nivelAlerta'],
-                    estimativaRt=row['estimativaRt'],
-                    populacaoEstimada=row['populacaoEstimada'],
-                    temperaturaMinMedia=row['temperaturaMinMedia'],
-                    temperaturaMedMedia=row['temperaturaMedMedia'],
-                    temperaturaMaxMedia=row['temperaturaMaxMedia'],
-                    umidadeMinMedia=row['umidadeMinMedia'],
-                    umidadeMedMedia=row['umidadeMedMedia'],
-                    umidadeMaxMedia=row['umidadeMaxMedia'],
-                    indicadorReceptividadeClimatica=row['indicadorReceptividadeClimatica'],
-                    evidenciaTransmissaoSustentada=row['evidenciaTransmissaoSustentada'],
-                    nivelIncidencia=row['nivelIncidencia'],
-                    casosAcumuladosAno=row['casosAcumuladosAno']
-                )
-                session.add(info_dengue)
-        session.commit()
-        logging.info(f"{len(df_infoDengue['municipioId'])} dados de dengue foram inseridos ou atualizados com sucesso!")
+        result = await load_dataframe(InfoDengue, df_infoDengue, returning=('municipioId', 'ano'))
+        logging.info(
+            f"{len(df_infoDengue['municipioId'])} dados de dengue carregados com sucesso: {result['inserted']} inseridos, "
+            f"{result['updated']} atualizados e {result['unchanged']} inalterados."
+        )
+        return result
     except Exception as e:
-        session.rollback()
         logging.error(f"Erro ao inserir ou atualizar dados de dengue: {e}")
-    finally:
-        session.close()
+        return None
 
 
 def get_all_infoDengue():
     """
     Obtem todos os dados de dengue do banco de dados.
 
-    Args:
-        session (Session): Sessão do SQLAlchemy.
-
     Returns:
         infoDengue (list): Uma lista de todos os dados de dengue.
     """
-    session = create_db_session()
-    try:
-        infoDengue = session.query(InfoDengue).all()
-        return infoDengue
-    except Exception as e:
-        logging.error(f"Erro ao obter dados de dengue: {e}")
+    with create_db_session() as session:
+        try:
+            infoDengue = session.query(InfoDengue).all()
+            return infoDengue
+        except Exception as e:
+            logging.error(f"Erro ao obter dados de dengue: {e}")
 
 def get_all_municipiosIBGE():
     """
     Obtem todos os municípios do banco de dados.
 
-    Args:
-        session (Session): Sessão do SQLAlchemy.
-
     Returns:
         municipios (list): Uma lista de todos os municípios.
     """
-    session = create_db_session()
-    try:
-        municipios = session.query(MunicipiosIBGE).all()
-        return municipios
-    except Exception as e:
-        logging.error(f"Erro ao obter municípios: {e}")
+    with create_db_session() as session:
+        try:
+            municipios = session.query(MunicipiosIBGE).all()
+            return municipios
+        except Exception as e:
+            logging.error(f"Erro ao obter municípios: {e}")
 
 def get_municipioId_municipiosIBGE():
     """
@@ -263,11 +572,371 @@ def get_municipioId_municipiosIBGE():
     Returns:
         municipioIds (list): Uma lista de todos os IDs dos municípios.
     """
-    session = create_db_session()
-    try:
-        municipioIds = session.query(MunicipiosIBGE.municipioId).distinct().all()
-        return [m[0] for m in municipioIds]
-    except Exception as e:
-        logging.error(f"Erro ao obter IDs dos municípios: {e}")
-    finally:
-        session.close()
\ No newline at end of file
+    with create_db_session() as session:
+        try:
+            municipioIds = session.query(MunicipiosIBGE.municipioId).distinct().all()
+            return [m[0] for m in municipioIds]
+        except Exception as e:
+            logging.error(f"Erro ao obter IDs dos municípios: {e}")
+
+def select_infoDengue_municipios(columns=None, filters=None, distinct=False):
+    """
+    Monta a consulta da junção de infoDengue e municipiosIBGE.
+
+    Args:
+        columns (list, optional): Colunas a serem selecionadas (padrão são todas as de INFODENGUE_MUNICIPIOS_DTYPES).
+        filters (dict, optional): Filtros de igualdade no formato {coluna: valor}.
+        distinct (bool, optional): Se True, retorna apenas as combinações distintas das colunas.
+
+    Returns:
+        Select: Consulta do SQLAlchemy.
+    """
+    table = {column.name: column for column in InfoDengue.__table__.columns}
+    table.update({column.name: column for column in MunicipiosIBGE.__table__.columns})
+    query = select(*[table[column] for column in columns or INFODENGUE_MUNICIPIOS_DTYPES]).join_from(
+        MunicipiosIBGE, InfoDengue, MunicipiosIBGE.municipioId == InfoDengue.municipioId
+    )
+    for column, value in (filters or {}).items():
+        query = query.where(table[column] == value)
+    if distinct:
+        query = query.distinct()
+    return query
+
+def iter_infoDengue_municipios(chunk_size=50000, columns=None, filters=None, distinct=False):
+    """
+    Lê os dados de dengue junto com os dados dos municípios, em DataFrames de até chunk_size linhas.
+
+    A consulta é uma única junção executada com um cursor no servidor (stream_results), de modo
+    que apenas um bloco de linhas fica na memória por vez. As linhas são decodificadas direto
+    em colunas com os tipos de INFODENGUE_MUNICIPIOS_DTYPES, sem criar objetos do ORM.
+
+    Args:
+        chunk_size (int, optional): Número máximo de linhas por DataFrame.
+        columns (list, optional): Colunas a serem lidas (padrão são todas).
+        filters (dict, optional): Filtros de igualdade no formato {coluna: valor}.
+        distinct (bool, optional): Se True, lê apenas as combinações distintas das colunas.
+
+    Yields:
+        pd.DataFrame: Blocos com as colunas de municipiosIBGE seguidas das colunas de infoDengue.
+    """
+    query = select_infoDengue_municipios(columns, filters, distinct)
+    dtypes = {column: INFODENGUE_MUNICIPIOS_DTYPES[column] for column in columns or INFODENGUE_MUNICIPIOS_DTYPES}
+    with get_engine().connect().execution_options(stream_results=True) as connection:
+        yield from pd.read_sql_query(query, connection, chunksize=chunk_size, dtype=dtypes)
+
+def get_infoDengue_municipios(chunk_size=50000, columns=None, filters=None, distinct=False):
+    """
+    Lê os dados de dengue junto com os dados dos municípios em um único DataFrame.
+
+    Args:
+        chunk_size (int, optional): Número de linhas lidas do cursor por vez.
+        columns (list, optional): Colunas a serem lidas (padrão são todas).
+        filters (dict, optional): Filtros de igualdade no formato {coluna: valor}.
+        distinct (bool, optional): Se True, lê apenas as combinações distintas das colunas.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas de municipiosIBGE seguidas das colunas de infoDengue.
+    """
+    chunks = list(iter_infoDengue_municipios(chunk_size, columns, filters, distinct))
+    if not chunks:
+        return pd.DataFrame({
+            column: pd.Series(dtype=INFODENGUE_MUNICIPIOS_DTYPES[column])
+            for column in columns or INFODENGUE_MUNICIPIOS_DTYPES
+        })
+    return pd.concat(chunks, ignore_index=True)
+
+def select_casosNotificados_por_ano(filters=None):
+    """
+    Monta a consulta dos casos notificados por ano a partir da tabela de resumo resumoMunicipioAno.
+
+    Args:
+        filters (dict, optional): Filtros de igualdade sobre as colunas de municipiosIBGE no formato {coluna: valor}.
+
+    Returns:
+        Select: Consulta do SQLAlchemy com as colunas ano e casosNotificados, ordenada por ano.
+    """
+    query = select(
+        ResumoMunicipioAno.ano, func.sum(ResumoMunicipioAno.casosNotificados).label('casosNotificados')
+    ).join(MunicipiosIBGE, MunicipiosIBGE.municipioId == ResumoMunicipioAno.municipioId)
+    for column, value in (filters or {}).items():
+        query = query.where(MunicipiosIBGE.__table__.c[column] == value)
+    return query.group_by(ResumoMunicipioAno.ano).order_by(ResumoMunicipioAno.ano)
+
+def get_casosNotificados_por_ano(filters=None):
+    """
+    Obtem os casos notificados por ano da tabela de resumo, sem ler as linhas semanais.
+
+    Args:
+        filters (dict, optional): Filtros de igualdade sobre as colunas de municipiosIBGE no formato {coluna: valor}.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas ano e casosNotificados, ordenado por ano.
+    """
+    with get_engine().connect() as connection:
+        return pd.read_sql_query(
+            select_casosNotificados_por_ano(filters), connection, dtype={'ano': 'int16', 'casosNotificados': 'float64'}
+        )
+
+def get_casosNotificados_municipios_ano(ano, estadoSigla):
+    """
+    Obtem o total de casos notificados de cada município de um estado em um ano, a partir da tabela de resumo.
+
+    Args:
+        ano (int): Ano.
+        estadoSigla (str): Sigla do estado.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas municipioNome e casosNotificados.
+    """
+    query = select(MunicipiosIBGE.municipioNome, ResumoMunicipioAno.casosNotificados).join(
+        MunicipiosIBGE, MunicipiosIBGE.municipioId == ResumoMunicipioAno.municipioId
+    ).where(MunicipiosIBGE.estadoSigla == estadoSigla, ResumoMunicipioAno.ano == ano)
+    with get_engine().connect() as connection:
+        return pd.read_sql_query(query, connection, dtype={'casosNotificados': 'float64'})
+
+def get_receptividade_estado_ano(ano, estadoSigla):
+    """
+    Obtem o indicador de receptividade climática semanal dos municípios de um estado em um ano, a partir
+    da tabela de resumo receptividadeMunicipioAno.
+
+    Args:
+        ano (int): Ano.
+        estadoSigla (str): Sigla do estado.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas municipioNome, semanaEpidemiologica e indicadorReceptividadeClimatica.
+    """
+    query = select(
+        ReceptividadeMunicipioAno.municipioNome, ReceptividadeMunicipioAno.semanas, ReceptividadeMunicipioAno.indicadores
+    ).where(ReceptividadeMunicipioAno.estadoSigla == estadoSigla, ReceptividadeMunicipioAno.ano == ano)
+    with get_engine().connect() as connection:
+        linhas = pd.read_sql_query(query, connection)
+    data = linhas.explode(['semanas', 'indicadores'], ignore_index=True).dropna(subset=['semanas'])
+    return pd.DataFrame({
+        'municipioNome': data['municipioNome'],
+        'semanaEpidemiologica': [f'{int(semana):02d}/{ano}' for semana in data['semanas']],
+        'indicadorReceptividadeClimatica': pd.to_numeric(data['indicadores']).astype('float32')
+    })
+
+def _upsert_from_select(connection, model, source):
+    # Insere ou atualiza as linhas de uma tabela de resumo a partir de uma consulta com as mesmas colunas
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    connection.execute(_on_conflict_update_changed(insert(table).from_select(columns, source), table))
+
+def _refresh_summaries(connection, keys, batch_size):
+    # Recalcula as linhas de resumo das chaves ordenadas na transação de connection
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        where = tuple_(InfoDengue.municipioId, InfoDengue.ano).in_(chunk)
+        _upsert_from_select(connection, ResumoMunicipioAno, select(
+            InfoDengue.municipioId, InfoDengue.ano,
+            func.sum(InfoDengue.casosNotificados), func.sum(InfoDengue.casosEstimados), func.count()
+        ).where(where).group_by(InfoDengue.municipioId, InfoDengue.ano))
+        _upsert_from_select(connection, ReceptividadeMunicipioAno, select(
+            InfoDengue.municipioId, InfoDengue.ano,
+            func.max(MunicipiosIBGE.estadoSigla), func.max(MunicipiosIBGE.municipioNome),
+            array_agg(aggregate_order_by(cast(InfoDengue.semana, SmallInteger), InfoDengue.semana)),
+            array_agg(aggregate_order_by(cast(InfoDengue.indicadorReceptividadeClimatica, SmallInteger), InfoDengue.semana))
+        ).join(MunicipiosIBGE, MunicipiosIBGE.municipioId == InfoDengue.municipioId).where(where).group_by(
+            InfoDengue.municipioId, InfoDengue.ano))
+
+    # Os resumos por estado são recalculados por inteiro para cada (estado, ano) afetado
+    estados = dict(connection.execute(
+        select(MunicipiosIBGE.municipioId, MunicipiosIBGE.estadoSigla)
+        .where(MunicipiosIBGE.municipioId.in_({municipioId for municipioId, _ in keys}))
+    ).all())
+    state_years = sorted({(estados[municipioId], ano) for municipioId, ano in keys if estados.get(municipioId)})
+    for start in range(0, len(state_years), batch_size):
+        chunk = state_years[start:start + batch_size]
+        casos_estimados, populacao = func.sum(InfoDengue.casosEstimados), func.sum(InfoDengue.populacaoEstimada)
+        _upsert_from_select(connection, IncidenciaEstadoSemana, select(
+            MunicipiosIBGE.estadoSigla, InfoDengue.ano, InfoDengue.semana,
+            func.max(MunicipiosIBGE.estadoNome), func.max(MunicipiosIBGE.regiaoNome),
+            func.max(InfoDengue.semanaEpidemiologica), func.sum(InfoDengue.casosNotificados),
+            casos_estimados, populacao, casos_estimados * 100000 / func.nullif(populacao, 0)
+        ).join(MunicipiosIBGE, MunicipiosIBGE.municipioId == InfoDengue.municipioId).where(
+            tuple_(MunicipiosIBGE.estadoSigla, InfoDengue.ano).in_(chunk)
+        ).group_by(MunicipiosIBGE.estadoSigla, InfoDengue.ano, InfoDengue.semana))
+    logging.info(f"Tabelas de resumo atualizadas para {len(keys)} municípios-ano e {len(state_years)} estados-ano.")
+
+def refresh_summary_tables(keys, batch_size=SUMMARY_REFRESH_BATCH):
+    """
+    Recalcula as tabelas de resumo apenas para os municípios e anos carregados.
+
+    As linhas de resumo de cada (município, ano) e de cada (estado, ano) afetado são recalculadas
+    a partir de infoDengue com INSERT ... SELECT ... ON CONFLICT DO UPDATE, sem reprocessar o
+    restante do histórico.
+
+    Args:
+        keys (iterable): Tuplas (municipioId, ano) carregadas.
+        batch_size (int, optional): Número de chaves recalculadas por comando.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    with get_engine().begin() as connection:
+        _refresh_summaries(connection, keys, batch_size)
+
+def refresh_pending_summaries(keys=(), batch_size=SUMMARY_REFRESH_BATCH):
+    """
+    Recalcula as tabelas de resumo para os municípios e anos carregados e para os que ficaram pendentes.
+
+    As chaves são registradas em resumosPendentes antes do recálculo e removidas na mesma transação
+    dele: se o recálculo falhar, elas continuam pendentes e são recalculadas na próxima execução,
+    junto com as chaves carregadas por ela.
+
+    Args:
+        keys (iterable, optional): Tuplas (municipioId, ano) carregadas na execução.
+        batch_size (int, optional): Número de chaves registradas ou recalculadas por comando.
+
+    Returns:
+        int: Número de chaves recalculadas.
+    """
+    keys = sorted(set(keys))
+    if keys:
+        with get_engine().begin() as connection:
+            for start in range(0, len(keys), batch_size):
+                connection.execute(insert(ResumoPendente).on_conflict_do_nothing(), [
+                    {'municipioId': municipioId, 'ano': ano} for municipioId, ano in keys[start:start + batch_size]
+                ])
+    with get_engine().begin() as connection:
+        pending = sorted(tuple(key) for key in connection.execute(select(ResumoPendente.municipioId, ResumoPendente.ano)).all())
+        if not pending:
+            return 0
+        _refresh_summaries(connection, pending, batch_size)
+        # Remove apenas as chaves recalculadas: outras registradas durante o recálculo continuam pendentes
+        for start in range(0, len(pending), batch_size):
+            connection.execute(delete(ResumoPendente).where(
+                tuple_(ResumoPendente.municipioId, ResumoPendente.ano).in_(pending[start:start + batch_size])
+            ))
+    return len(pending)
+
+def record_pipeline_run(tipo, iniciadoEm, linhas):
+    """
+    Registra uma execução concluída do pipeline.
+
+    Args:
+        tipo (str): Tipo da execução ('pipeline' ou 'backfill').
+        iniciadoEm (datetime): Início da execução.
+        linhas (int): Número de linhas inseridas ou alteradas na execução.
+
+    Returns:
+        int or None: ID da execução ou None se ocorrer um erro.
+    """
+    with create_db_session() as session:
+        try:
+            run = PipelineRun(tipo=tipo, iniciadoEm=iniciadoEm, linhas=linhas)
+            session.add(run)
+            session.commit()
+            return run.runId
+        except Exception as e:
+            session.rollback()
+            logging.error(f"Erro ao registrar a execução do pipeline: {e}")
+
+def get_data_version():
+    """
+    Obtem a versão dos dados: o ID da última execução que carregou linhas.
+
+    Returns:
+        int or None: ID da execução ou None se nenhuma execução tiver carregado dados.
+    """
+    with create_db_session() as session:
+        try:
+            return session.query(func.max(PipelineRun.runId)).filter(PipelineRun.linhas > 0).scalar()
+        except Exception as e:
+            logging.error(f"Erro ao obter a versão dos dados: {e}")
+
+def get_last_week_infoDengue():
+    """
+    Obtem a última semana epidemiológica armazenada de cada município.
+
+    Returns:
+        last_weeks (dict): Dicionário {municipioId: (ano, semana)} com a semana mais recente de cada município.
+    """
+    with create_db_session() as session:
+        try:
+            last_weeks = session.query(
+                InfoDengue.municipioId,
+                func.max(InfoDengue.ano * 100 + InfoDengue.semana)
+            ).group_by(InfoDengue.municipioId).all()
+            return {municipioId: (se // 100, se % 100) for municipioId, se in last_weeks}
+        except Exception as e:
+            logging.error(f"Erro ao obter as últimas semanas de dengue: {e}")
+            return {}
+
+def plan_backfill_jobs(municipioIds, year_ranges):
+    """
+    Registra os blocos da carga histórica que ainda não existem na tabela de controle.
+
+    Args:
+        municipioIds (list): IDs dos municípios.
+        year_ranges (list): Lista de tuplas (ano inicial, ano final) de cada bloco.
+    """
+    records = [
+        {'municipioId': municipioId, 'anoInicio': start_year, 'anoFim': end_year, 'status': 'pending', 'tentativas': 0}
+        for municipioId in municipioIds
+        for start_year, end_year in year_ranges
+    ]
+    with create_db_session() as session:
+        try:
+            for start in range(0, len(records), LOAD_BATCH_SIZE):
+                stmt = insert(BackfillJob).on_conflict_do_nothing(index_elements=['municipioId', 'anoInicio', 'anoFim'])
+                session.execute(stmt, records[start:start + LOAD_BATCH_SIZE])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"Erro ao planejar a carga histórica: {e}")
+
+def get_pending_backfill_jobs(year_ranges, max_attempts):
+    """
+    Obtem os blocos da carga histórica que ainda precisam ser executados.
+
+    Blocos 'in_progress' são incluídos, pois indicam uma execução interrompida.
+
+    Args:
+        year_ranges (list): Lista de tuplas (ano inicial, ano final) consideradas.
+        max_attempts (int): Blocos com este número de tentativas ou mais são ignorados.
+
+    Returns:
+        jobs (list): Lista de tuplas (jobId, municipioId, anoInicio, anoFim).
+    """
+    with create_db_session() as session:
+        try:
+            jobs = session.query(
+                BackfillJob.jobId, BackfillJob.municipioId, BackfillJob.anoInicio, BackfillJob.anoFim
+            ).filter(
+                BackfillJob.status != 'done',
+                BackfillJob.tentativas < max_attempts,
+                tuple_(BackfillJob.anoInicio, BackfillJob.anoFim).in_(year_ranges)
+            ).order_by(BackfillJob.anoInicio.desc(), BackfillJob.municipioId).all()
+            return [tuple(job) for job in jobs]
+        except Exception as e:
+            logging.error(f"Erro ao obter blocos pendentes da carga histórica: {e}")
+            return []
+
+def update_backfill_jobs(jobIds, status, rows=None, error=None):
+    """
+    Atualiza o status de blocos da carga histórica.
+
+    Args:
+        jobIds (list): IDs dos blocos.
+        status (str): Novo status ('in_progress', 'done' ou 'failed').
+        rows (int or dict, optional): Número de linhas carregadas pelos blocos, ou {jobId: linhas} para valores distintos.
+        error (str, optional): Mensagem de erro do bloco.
+    """
+    values = {'status': status, 'erro': error}
+    if status == 'in_progress':
+        values['tentativas'] = BackfillJob.tentativas + 1
+    if isinstance(rows, dict):
+        # Um único UPDATE para o lote, com o número de linhas de cada bloco
+        values['linhas'] = case(rows, value=BackfillJob.jobId)
+    elif rows is not None:
+        values['linhas'] = rows
+    with create_db_session() as session:
+        try:
+            session.execute(update(BackfillJob).where(BackfillJob.jobId.in_(jobIds)).values(**values))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"Erro ao atualizar blocos da carga histórica: {e}")
@@ -1,12 +1,42 @@
-from extract import get_data_municipiosIBGE, get_data_infoDengue
-from transform import transform_data_municipios_IBGE, transform_data_infoDengue
-from load import create_municipiosIBGE, create_infoDengue, get_municipioId_municipiosIBGE
+from extract import create_http_session, log_request_stats, get_data_municipiosIBGE, get_data_infoDengue
+from transform import transform_data_municipios_IBGE, transform_data_infoDengue, configure_transform_executor, shutdown_transform_executor
+from load import init_db, dispose_engines, create_municipiosIBGE, create_infoDengue, get_municipioId_municipiosIBGE, get_last_week_infoDengue, iter_infoDengue_municipios, refresh_pending_summaries, record_pipeline_run, get_data_version
+from snapshot import write_snapshot, read_manifest, SNAPSHOT_ENABLED, SNAPSHOT_DIR
+from metrics import metrics, write_run_metrics
+from datetime import date, datetime
+import pandas as pd
+import argparse
 import logging
 import asyncio
+import time
+import os
 
-logging.basicConfig(level=logging.INFO, filename="logs/pipeline.log", filemode='w', format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
+# Número de coroutines de extração, ou seja, municípios processados simultaneamente
+PIPELINE_CONCURRENCY = int(os.environ.get('PIPELINE_CONCURRENCY', 20))
+# Número máximo de DataFrames aguardando a etapa de carga
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 100))
+# Um lote é carregado ao atingir este número de linhas...
+LOAD_BATCH_ROWS = int(os.environ.get('LOAD_BATCH_ROWS', 5000))
+# ...ou após este número de segundos desde o seu primeiro DataFrame
+LOAD_BATCH_SECONDS = float(os.environ.get('LOAD_BATCH_SECONDS', 5))
+# Semanas já armazenadas que são baixadas novamente no modo incremental, pois o nowcasting revisa valores anteriores
+INCREMENTAL_LOOKBACK_WEEKS = int(os.environ.get('INCREMENTAL_LOOKBACK_WEEKS', 4))
 
-async def pipeline_municipiosIBGE():
+# Linhas inseridas ou atualizadas na execução e pares (municipioId, ano) cujas linhas de resumo precisam ser recalculadas
+loaded = {'rows': 0, 'keys': set()}
+
+def count_loaded_rows(tabela, result):
+    """
+    Registra nas métricas da execução as linhas inseridas, atualizadas e inalteradas de uma carga.
+
+    Args:
+        tabela (str): Nome da tabela carregada.
+        result (dict): Contagens retornadas por create_municipiosIBGE ou create_infoDengue.
+    """
+    for status in ('inserted', 'updated', 'unchanged'):
+        metrics.inc('load_rows_total', result[status], tabela=tabela, status=status)
+
+async def pipeline_municipiosIBGE(session):
     """
     Executa um pipeline de processamento de dados do IBGE.
 
@@ -15,48 +45,317 @@ async def pipeline_municipiosIBGE():
     2. Transformar os dados em um DataFrame estruturado para os municípios.
     3. Inserir os dados dos municípios no banco de dados.
 
+    Args:
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada.
     """
     try:
         logging.info('Iniciando pipeline IBGE...')
-        data = await get_data_municipiosIBGE()
+        data = await get_data_municipiosIBGE(session)
         if data:
             municipios = await transform_data_municipios_IBGE(data)
-            await create_municipiosIBGE(municipios)
+            # As cargas são medidas aqui, e não em load.py, que também é importado pelo dashboard
+            with metrics.track('load', tabela='municipiosIBGE'):
+                result = await create_municipiosIBGE(municipios)
+            if result is not None:
+                count_loaded_rows('municipiosIBGE', result)
             logging.info('Pipeline IBGE executada com sucesso.')
         else:
             logging.error('Nenhum dado foi extraído da API do IBGE.')
     except Exception as e:
         logging.error(f'Erro ao executar pipeline IBGE: {e}')
 
-async def pipeline_infoDengue(ibge_code):
+async def pipeline_infoDengue(ibge_code, session, start_year=date.today().year, start_week=1):
     """
-    Executa um pipeline de processamento de dados da Info Dengue para todos os municípios do IBGE.
+    Extrai e transforma os dados da Info Dengue de um município.
 
     Este pipeline consiste em:
-    1. Obter todos os municípios cadastrados no banco de dados.
-    2. Para cada município, buscar dados de incidência de dengue na API da Info Dengue.
-    3. Transformar os dados de dengue em um DataFrame para o município.
-    4. Inserir os dados de dengue no banco de dados.
+    1. Buscar dados de incidência de dengue do município na API da Info Dengue.
+    2. Transformar os dados de dengue em um DataFrame para o município.
+
+    A carga no banco de dados é feita em lotes pela etapa de carga (loader_infoDengue).
 
+    Args:
+        ibge_code (int): Código do município do IBGE.
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada.
+        start_year (int, optional): Ano inicial da consulta (padrão é o ano atual).
+        start_week (int, optional): Semana epidemiológica inicial do ano inicial (padrão é 1).
+
+    Returns:
+        pd.DataFrame or None: DataFrame de dengue do município, None se a extração ou a transformação falhar.
     """
     try:
-        data = await get_data_infoDengue(ibge_code)
+        data = await get_data_infoDengue(ibge_code, start_year=start_year, session=session, start_week=start_week)
         if data:
             dengue = await transform_data_infoDengue(data, ibge_code)
-            await create_infoDengue(dengue)
             logging.info(f'Pipeline InfoDengue para o município {ibge_code} executada com sucesso.')
+            return dengue
         else:
             logging.error(f'Nenhum dado foi extraído da API da Info Dengue para o município {ibge_code}.')
     except Exception as e:
         logging.error(f'Erro ao executar pipeline InfoDengue para o município {ibge_code}: {e}')
+    return None
+
+class StageStats:
+    """
+    Acumula os contadores de vazão de uma etapa do pipeline.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.busy = 0.0
+
+    def report(self, elapsed):
+        """
+        Registra no log a vazão da etapa.
+
+        Args:
+            elapsed (float): Duração total do pipeline em segundos.
+        """
+        logging.info(
+            f'Etapa {self.name}: {self.items} itens, {self.rows} linhas, {self.busy:.1f}s ocupada, '
+            f'{self.items / elapsed:.1f} itens/s, {self.rows / elapsed:.1f} linhas/s.'
+        )
+
+async def extractor_infoDengue(codes, frames, session, stats):
+    """
+    Etapa de extração: consome códigos de municípios e publica os DataFrames transformados.
+
+    Args:
+        codes (asyncio.Queue): Fila de tuplas (código do IBGE, ano inicial, semana inicial) a serem processadas.
+        frames (asyncio.Queue): Fila limitada de tuplas (código do IBGE, DataFrame) para a etapa de carga.
+        session (aiohttp.ClientSession): Sessão HTTP compartilhada.
+        stats (StageStats): Contadores da etapa de extração.
+    """
+    while True:
+        try:
+            ibge_code, start_year, start_week = codes.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        dengue = await pipeline_infoDengue(ibge_code, session, start_year, start_week)
+        stats.busy += time.perf_counter() - start
+        stats.items += 1
+        if dengue is not None and not dengue.empty:
+            stats.rows += len(dengue)
+            # Bloqueia quando a fila está cheia, limitando a memória usada entre as etapas
+            await frames.put((ibge_code, dengue))
+
+async def flush_infoDengue(batch, stats, on_flush=None):
+    """
+    Concatena os DataFrames acumulados e os carrega no banco de dados em uma única transação.
+
+    Args:
+        batch (list): Lista de tuplas (chave, DataFrame de dengue).
+        stats (StageStats): Contadores da etapa de carga.
+        on_flush (callable, optional): Coroutine chamada com (chaves do lote, sucesso da carga).
+    """
+    if not batch:
+        return
+    start = time.perf_counter()
+    dengue = pd.concat([frame for _, frame in batch], ignore_index=True)
+    with metrics.track('load', tabela='infoDengue'):
+        result = await create_infoDengue(dengue)
+    success = result is not None
+    if success:
+        count_loaded_rows('infoDengue', result)
+        # Apenas as linhas inseridas ou atualizadas mudam os resumos, o snapshot e a versão dos dados
+        loaded['rows'] += result['inserted'] + result['updated']
+        loaded['keys'].update(result['changed'])
+    stats.busy += time.perf_counter() - start
+    stats.items += 1
+    stats.rows += len(dengue)
+    if on_flush is not None:
+        await on_flush([key for key, _ in batch], success)
+
+async def loader_infoDengue(frames, stats, on_flush=None):
+    """
+    Etapa de carga: agrupa os DataFrames de vários municípios em lotes.
+
+    Um lote é carregado quando atinge LOAD_BATCH_ROWS linhas ou quando LOAD_BATCH_SECONDS
+    segundos se passam desde o seu primeiro DataFrame. A etapa termina ao receber None.
+
+    Args:
+        frames (asyncio.Queue): Fila limitada de tuplas (chave, DataFrame) vindas da etapa de extração.
+        stats (StageStats): Contadores da etapa de carga.
+        on_flush (callable, optional): Coroutine chamada após cada lote com (chaves do lote, sucesso da carga).
+    """
+    batch, batch_rows, deadline = [], 0, None
+    while True:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            item = await asyncio.wait_for(frames.get(), timeout)
+        except asyncio.TimeoutError:
+            # A janela de tempo do lote expirou
+            await flush_infoDengue(batch, stats, on_flush)
+            batch, batch_rows, deadline = [], 0, None
+            continue
+        if item is None:
+            await flush_infoDengue(batch, stats, on_flush)
+            return
+        if not batch:
+            deadline = time.monotonic() + LOAD_BATCH_SECONDS
+        batch.append(item)
+        batch_rows += len(item[1])
+        if batch_rows >= LOAD_BATCH_ROWS:
+            await flush_infoDengue(batch, stats, on_flush)
+            batch, batch_rows, deadline = [], 0, None
+
+async def run_stages(loader, extractors, frames):
+    """
+    Executa a etapa de carga junto com as coroutines de extração e aguarda o fim de todas.
+
+    As etapas rodam em um asyncio.TaskGroup: se a carga falhar, as extrações (que estariam
+    bloqueadas na fila cheia) são canceladas e o erro é propagado, em vez de a execução travar.
+
+    Args:
+        loader (coroutine): Etapa de carga (loader_infoDengue), que termina ao receber None.
+        extractors (list): Coroutines da etapa de extração.
+        frames (asyncio.Queue): Fila entre as etapas.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(loader)
+            await asyncio.gather(*[group.create_task(extractor) for extractor in extractors])
+            # Sinaliza o fim da extração para a etapa de carga
+            await frames.put(None)
+    except* Exception as errors:
+        for error in errors.exceptions:
+            logging.critical(f'Erro nas etapas de extração e carga: {error!r}')
+        raise
+
+def incremental_start(last_week, lookback=INCREMENTAL_LOOKBACK_WEEKS):
+    """
+    Calcula a semana epidemiológica inicial de uma extração incremental.
+
+    Args:
+        last_week (tuple): Última semana armazenada no formato (ano, semana).
+        lookback (int, optional): Número de semanas armazenadas a serem baixadas novamente.
+
+    Returns:
+        tuple: Semana inicial no formato (ano, semana).
+    """
+    year, week = last_week
+    week -= lookback
+    while week < 1:
+        # Considera anos de 52 semanas; anos de 53 semanas apenas ampliam a janela em uma semana
+        year, week = year - 1, week + 52
+    return year, week
+
+async def refresh_summaries():
+    """
+    Atualiza as tabelas de resumo do dashboard apenas para os municípios e anos carregados na execução
+    e para os que ficaram pendentes em execuções anteriores (ver refresh_pending_summaries).
+
+    Returns:
+        bool: True se as tabelas de resumo foram atualizadas.
+    """
+    try:
+        with metrics.track('summary_refresh'):
+            await asyncio.to_thread(refresh_pending_summaries, loaded['keys'])
+        return True
+    except Exception as e:
+        logging.error(f'Erro ao atualizar as tabelas de resumo: {e}')
+        return False
+
+async def export_snapshot(version=None):
+    """
+    Gera o snapshot analítico em Parquet lido pelo dashboard, a partir dos dados já carregados.
+
+    Uma falha na geração do snapshot é registrada, mas não interrompe o pipeline: o dashboard
+    continua usando o snapshot anterior ou, na falta dele, o banco de dados.
+
+    Args:
+        version (int, optional): Versão dos dados (runId da execução) registrada no manifesto do snapshot.
+    """
+    if not SNAPSHOT_ENABLED:
+        return
+    try:
+        with metrics.track('snapshot'):
+            await asyncio.to_thread(write_snapshot, iter_infoDengue_municipios(), SNAPSHOT_DIR, version)
+    except Exception as e:
+        logging.error(f'Erro ao gerar o snapshot analítico: {e}')
+
+async def finish_run(tipo, started_at):
+    """
+    Conclui uma execução: atualiza as tabelas de resumo, registra a execução em pipelineRuns,
+    gera o snapshot analítico e grava as métricas da execução (ver metrics.write_run_metrics).
+
+    O runId registrado é a versão dos dados que o dashboard usa para invalidar os seus caches.
+    O snapshot é gerado quando a execução inseriu ou alterou linhas ou quando a versão do seu manifesto
+    difere da versão atual dos dados (get_data_version): assim, um snapshot que não pôde ser gerado em
+    uma execução anterior é gerado nesta, e uma execução que não alterou nada mantém o snapshot existente.
+
+    Args:
+        tipo (str): Tipo da execução ('pipeline' ou 'backfill').
+        started_at (datetime): Início da execução.
+    """
+    refreshed = await refresh_summaries()
+    run_id = await asyncio.to_thread(record_pipeline_run, tipo, started_at, loaded['rows'])
+    if SNAPSHOT_ENABLED:
+        version = await asyncio.to_thread(get_data_version)
+        manifest = await asyncio.to_thread(read_manifest, SNAPSHOT_DIR)
+        if loaded['rows'] or manifest is None or manifest.get('version') != version:
+            await export_snapshot(version)
+    write_run_metrics(tipo, started_at, run_id)
+    loaded['rows'] = 0
+    if refreshed:
+        # Se a atualização falhou, as chaves continuam pendentes também em resumosPendentes
+        loaded['keys'] = set()
+    metrics.reset()
+
+async def pipeline(incremental=False):
+    """
+    Executa o pipeline completo: municípios do IBGE e dados de dengue de todos os municípios.
+
+    Args:
+        incremental (bool, optional): Se True, busca para cada município apenas as semanas a partir
+            da última armazenada (menos INCREMENTAL_LOOKBACK_WEEKS). Municípios sem dados são
+            buscados desde a primeira semana do ano atual.
+    """
+    started_at = datetime.now()
+    # Cria as tabelas uma única vez, antes de qualquer carga
+    init_db()
+
+    # Uma única sessão HTTP é compartilhada por todas as requisições do pipeline
+    async with create_http_session() as session:
+        await pipeline_municipiosIBGE(session)
 
-async def pipeline():
-    await pipeline_municipiosIBGE()
+        last_weeks = get_last_week_infoDengue() if incremental else {}
+        codes = asyncio.Queue()
+        for ibge_code in get_municipioId_municipiosIBGE() or []:
+            if ibge_code in last_weeks:
+                start_year, start_week = incremental_start(last_weeks[ibge_code])
+            else:
+                start_year, start_week = date.today().year, 1
+            codes.put_nowait((ibge_code, start_year, start_week))
+        frames = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
 
-    ibge_codes = get_municipioId_municipiosIBGE()
-    tasks = [pipeline_infoDengue(ibge_code) for ibge_code in ibge_codes]
+        extract_stats, load_stats = StageStats('extração e transformação'), StageStats('carga')
+        start = time.perf_counter()
+        extractors = [
+            extractor_infoDengue(codes, frames, session, extract_stats)
+            for _ in range(PIPELINE_CONCURRENCY)
+        ]
+        await run_stages(loader_infoDengue(frames, load_stats), extractors, frames)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        extract_stats.report(elapsed)
+        load_stats.report(elapsed)
+        log_request_stats()
 
-    await asyncio.gather(*tasks)
+    await finish_run('pipeline', started_at)
+    shutdown_transform_executor()
+    await dispose_engines()
 
 if __name__ == '__main__':
-    asyncio.run(pipeline())
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, filename="logs/pipeline.log", filemode='w', format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
+    parser = argparse.ArgumentParser(description='Pipeline ETL dos dados do IBGE e da Info Dengue.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Busca apenas as semanas epidemiológicas posteriores às já armazenadas.')
+    parser.add_argument('--transform-executor', choices=['inline', 'thread', 'process'], default=None,
+                        help='Onde as transformações são executadas (padrão: TRANSFORM_EXECUTOR).')
+    parser.add_argument('--transform-workers', type=int, default=None,
+                        help='Número de workers do pool de transformações (padrão: TRANSFORM_WORKERS).')
+    args = parser.parse_args()
+    configure_transform_executor(args.transform_executor, args.transform_workers)
+    asyncio.run(pipeline(incremental=args.incremental))
\ No newline at end of file
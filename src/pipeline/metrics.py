@@ -0,0 +1,274 @@
+from contextlib import contextmanager
+from datetime import datetime
+from dotenv import load_dotenv
+import bisect
+import logging
+import json
+import time
+import os
+
+# Carrega as variáveis de ambiente a partir do arquivo .env
+load_dotenv()
+
+# Saídas das métricas de cada execução
+METRICS_FILE = os.environ.get('METRICS_FILE', 'logs/metrics.jsonl')  # Resumo em JSON, uma linha por execução (vazio = desativado)
+METRICS_PROMETHEUS_FILE = os.environ.get('METRICS_PROMETHEUS_FILE', '')  # Arquivo para o textfile collector do node_exporter (vazio = desativado)
+METRICS_PREFIX = 'etl_dengue'  # Prefixo das métricas no formato do Prometheus
+
+# Limites (s) dos intervalos dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+class Histogram:
+    """
+    Histograma de latências com intervalos fixos, no mesmo formato dos histogramas do Prometheus.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # O último intervalo é +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Registra uma observação.
+
+        Args:
+            value (float): Valor observado, em segundos.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estima um quantil pelo limite superior do intervalo que o contém.
+
+        Args:
+            q (float): Quantil entre 0 e 1.
+
+        Returns:
+            float or None: Quantil estimado ou None se não houver observações.
+        """
+        if not self.count:
+            return None
+        target, total = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= target:
+                return min(bound, self.max)
+        return self.max
+
+class Metrics:
+    """
+    Registro das métricas de uma execução do pipeline: contadores, gauges e histogramas de latência.
+
+    Cada métrica é identificada pelo nome e por rótulos (ex.: host='apiadmin.infodengue.mat.br').
+    As métricas são atualizadas apenas no loop de eventos, por isso não usam locks.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Descarta todas as métricas registradas.
+        """
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """
+        Incrementa um contador.
+
+        Args:
+            name (str): Nome do contador (terminado em _total).
+            value (float, optional): Incremento (padrão é 1).
+            **labels: Rótulos da métrica.
+        """
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_gauge(self, name, value, **labels):
+        """
+        Soma um valor a um gauge, registrando também o seu máximo na execução (gauge <nome>_max).
+
+        Args:
+            name (str): Nome do gauge.
+            value (float): Valor a ser somado (negativo para decrementar).
+            **labels: Rótulos da métrica.
+        """
+        key, max_key = self._key(name, labels), self._key(name + '_max', labels)
+        self.gauges[key] = self.gauges.get(key, 0) + value
+        self.gauges[max_key] = max(self.gauges.get(max_key, 0), self.gauges[key])
+
+    def observe(self, name, value, **labels):
+        """
+        Registra uma latência em um histograma.
+
+        Args:
+            name (str): Nome do histograma (terminado em _seconds).
+            value (float): Latência em segundos.
+            **labels: Rótulos da métrica.
+        """
+        key = self._key(name, labels)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        self.histograms[key].observe(value)
+
+    @contextmanager
+    def track(self, stage, **labels):
+        """
+        Mede uma operação de uma etapa: a sua latência (histograma <etapa>_seconds) e o número de
+        operações em andamento (gauge <etapa>_in_flight).
+
+        Args:
+            stage (str): Nome da etapa (ex.: 'extract', 'transform', 'load').
+            **labels: Rótulos da métrica.
+        """
+        self.add_gauge(f'{stage}_in_flight', 1, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f'{stage}_seconds', time.perf_counter() - start, **labels)
+            self.add_gauge(f'{stage}_in_flight', -1, **labels)
+
+    def counter_total(self, name, **labels):
+        """
+        Soma um contador sobre todas as combinações de rótulos que contêm os rótulos informados.
+        """
+        return sum(value for (key_name, key_labels), value in self.counters.items()
+                   if key_name == name and set(labels.items()) <= set(key_labels))
+
+    def summary(self):
+        """
+        Monta o resumo das métricas em um dicionário serializável em JSON.
+
+        Returns:
+            dict: {'counters': [...], 'gauges': [...], 'histograms': [...]}, cada item com name, labels e valores.
+        """
+        def item(key, **values):
+            name, labels = key
+            return {'name': name, 'labels': dict(labels), **values}
+
+        return {
+            'counters': [item(key, value=value) for key, value in sorted(self.counters.items())],
+            'gauges': [item(key, value=value) for key, value in sorted(self.gauges.items())],
+            'histograms': [
+                item(key, count=h.count, sum=round(h.sum, 6), mean=round(h.sum / h.count, 6) if h.count else None,
+                     **{f'p{round(q * 100)}': round(h.quantile(q), 6) if h.count else None for q in (0.5, 0.95, 0.99)},
+                     max=round(h.max, 6))
+                for key, h in sorted(self.histograms.items())
+            ],
+        }
+
+    def prometheus(self, prefix=METRICS_PREFIX):
+        """
+        Formata as métricas no formato de texto do Prometheus.
+
+        Args:
+            prefix (str, optional): Prefixo dos nomes das métricas.
+
+        Returns:
+            str: Métricas no formato de exposição do Prometheus.
+        """
+        def labels_text(labels, **extra):
+            pairs = [*labels, *extra.items()]
+            if not pairs:
+                return ''
+            escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+        lines, declared = [], set()
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        for kind, values in (('counter', self.counters), ('gauge', self.gauges)):
+            for (name, labels), value in sorted(values.items()):
+                declare(f'{prefix}_{name}', kind)
+                lines.append(f'{prefix}_{name}{labels_text(labels)} {value}')
+        for (name, labels), h in sorted(self.histograms.items()):
+            full_name = f'{prefix}_{name}'
+            declare(full_name, 'histogram')
+            cumulative = 0
+            for bound, count in zip((*h.buckets, '+Inf'), h.counts):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{labels_text(labels, le=bound)} {cumulative}')
+            lines.append(f'{full_name}_sum{labels_text(labels)} {h.sum}')
+            lines.append(f'{full_name}_count{labels_text(labels)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+# Métricas da execução atual
+metrics = Metrics()
+
+def _write_atomic(path, content):
+    # Grava em um arquivo temporário e o renomeia, para que leitores nunca vejam um arquivo incompleto
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+
+def write_run_metrics(tipo, started_at, run_id=None, metrics_file=METRICS_FILE, prometheus_file=METRICS_PROMETHEUS_FILE):
+    """
+    Grava o resumo das métricas da execução em JSON e, se configurado, no textfile do Prometheus.
+
+    O resumo é acrescentado como uma linha ao arquivo METRICS_FILE, de modo que execuções
+    sucessivas possam ser comparadas. Falhas na gravação são registradas no log, sem interromper o pipeline.
+
+    Args:
+        tipo (str): Tipo da execução ('pipeline' ou 'backfill').
+        started_at (datetime): Início da execução.
+        run_id (int, optional): ID da execução em pipelineRuns.
+        metrics_file (str, optional): Arquivo do resumo em JSON (padrão é METRICS_FILE).
+        prometheus_file (str, optional): Arquivo do textfile collector (padrão é METRICS_PROMETHEUS_FILE).
+
+    Returns:
+        dict: Resumo da execução.
+    """
+    elapsed = max((datetime.now() - started_at).total_seconds(), 1e-9)
+    metrics.gauges[metrics._key('run_duration_seconds', {})] = elapsed
+    load_seconds = sum(h.sum for (name, _), h in metrics.histograms.items() if name == 'load_seconds')
+    rows = metrics.counter_total('load_rows_total')
+    summary = {
+        'runId': run_id,
+        'tipo': tipo,
+        'iniciadoEm': started_at.isoformat(),
+        'duracao': round(elapsed, 3),
+        'linhasCarregadas': rows,
+        'linhasInseridas': metrics.counter_total('load_rows_total', status='inserted'),
+        'linhasAtualizadas': metrics.counter_total('load_rows_total', status='updated'),
+        'linhasInalteradas': metrics.counter_total('load_rows_total', status='unchanged'),
+        'linhasPorSegundo': round(rows / elapsed, 1),
+        'linhasPorSegundoCarga': round(rows / load_seconds, 1) if load_seconds else None,
+        'bytesBaixados': metrics.counter_total('http_bytes_total'),
+        'novasTentativas': metrics.counter_total('http_retries_total'),
+        **metrics.summary(),
+    }
+    try:
+        if metrics_file:
+            directory = os.path.dirname(metrics_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(metrics_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+        if prometheus_file:
+            _write_atomic(prometheus_file, metrics.prometheus())
+    except OSError as e:
+        logging.error(f'Erro ao gravar as métricas da execução: {e}')
+    logging.info(
+        f"Métricas da execução: {summary['duracao']:.1f}s, {rows} linhas carregadas "
+        f"({summary['linhasInseridas']} inseridas, {summary['linhasAtualizadas']} atualizadas, "
+        f"{summary['linhasInalteradas']} inalteradas; {summary['linhasPorSegundo']:.1f} linhas/s), {summary['bytesBaixados']} bytes baixados, "
+        f"{summary['novasTentativas']} novas tentativas."
+    )
+    return summary
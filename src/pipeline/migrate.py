@@ -0,0 +1,85 @@
+from load import get_engine, init_db, refresh_summary_tables, InfoDengue, MunicipiosIBGE, DB_PARTITION_BY_YEAR, infoDengue_is_partitioned, create_infoDengue_partitions
+from sqlalchemy import select, text
+from datetime import date
+import logging
+
+def create_indexes():
+    """
+    Cria os índices declarados nos modelos que ainda não existem no banco de dados.
+
+    Tabelas criadas pelo init_db já nascem com os índices; esta etapa atualiza bancos
+    criados antes da declaração dos índices.
+    """
+    with get_engine().begin() as connection:
+        for model in (MunicipiosIBGE, InfoDengue):
+            for index in model.__table__.indexes:
+                index.create(connection, checkfirst=True)
+                logging.info(f'Índice {index.name} verificado.')
+
+def partition_infoDengue():
+    """
+    Converte a tabela infoDengue existente em uma tabela particionada por ano.
+
+    A tabela atual é renomeada, a nova tabela particionada é criada com as partições anuais
+    e os dados são copiados para ela, tudo em uma única transação.
+
+    Linhas sem ano têm o ano obtido da semana epidemiológica (SS/AAAA). As que ainda assim ficam
+    sem ano não cabem em nenhuma partição: elas não são copiadas e a tabela antiga é mantida como
+    infoDengue_old para conferência, em vez de ser apagada.
+    """
+    table = InfoDengue.__table__
+    columns = ', '.join(f'"{column.name}"' for column in table.columns)
+    with get_engine().begin() as connection:
+        if infoDengue_is_partitioned(connection):
+            logging.info('A tabela infoDengue já é particionada.')
+            return
+        connection.execute(text('ALTER TABLE "infoDengue" RENAME TO "infoDengue_old"'))
+        connection.execute(text('ALTER TABLE "infoDengue_old" RENAME CONSTRAINT "infoDengue_pkey" TO "infoDengue_old_pkey"'))
+        derived = connection.execute(text(
+            'UPDATE "infoDengue_old" SET "ano" = split_part("semanaEpidemiologica", \'/\', 2)::integer '
+            'WHERE "ano" IS NULL AND "semanaEpidemiologica" ~ \'^[0-9]{1,2}/[0-9]{4}$\''
+        )).rowcount
+        if derived:
+            logging.info(f'Ano obtido da semana epidemiológica para {derived} linhas de infoDengue sem ano.')
+        missing = connection.execute(text('SELECT count(*) FROM "infoDengue_old" WHERE "ano" IS NULL')).scalar()
+        last_year = connection.execute(text('SELECT max("ano") FROM "infoDengue_old"')).scalar() or date.today().year
+        for index in table.indexes:
+            connection.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+        table.create(connection)
+        create_infoDengue_partitions(connection, max(last_year, date.today().year + 1))
+        rows = connection.execute(text(
+            f'INSERT INTO "infoDengue" ({columns}) SELECT {columns} FROM "infoDengue_old" WHERE "ano" IS NOT NULL'
+        )).rowcount
+        if missing:
+            logging.warning(
+                f'{missing} linhas de infoDengue sem ano não foram copiadas para a tabela particionada; '
+                'a tabela anterior foi mantida como infoDengue_old.'
+            )
+        else:
+            connection.execute(text('DROP TABLE "infoDengue_old"'))
+    logging.info(f'Tabela infoDengue particionada por ano com {rows} linhas.')
+
+def populate_summary_tables():
+    """
+    Preenche as tabelas de resumo com todo o histórico já carregado em infoDengue.
+    """
+    with get_engine().connect() as connection:
+        keys = connection.execute(select(InfoDengue.municipioId, InfoDengue.ano).distinct()).all()
+    refresh_summary_tables([tuple(key) for key in keys])
+
+def migrate():
+    """
+    Atualiza o esquema do banco de dados: cria as tabelas e os índices que faltam, preenche as
+    tabelas de resumo e, com DB_PARTITION_BY_YEAR=true, converte a tabela infoDengue em uma
+    tabela particionada por ano.
+    """
+    init_db()
+    if DB_PARTITION_BY_YEAR:
+        partition_infoDengue()
+    create_indexes()
+    populate_summary_tables()
+    logging.info('Migração do banco de dados concluída.')
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, filename="logs/migrate.log", filemode='a', format="%(asctime)s - %(levelname)s - %(message)s", encoding="utf-8")
+    migrate()
@@ -0,0 +1,162 @@
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+import logging
+import shutil
+import json
+import os
+
+# Carrega as variáveis de ambiente a partir do arquivo .env
+load_dotenv()
+
+# Configuração do snapshot analítico lido pelo dashboard
+SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true'  # Gera o snapshot ao final do pipeline
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', 'data/snapshot')  # Diretório do snapshot em Parquet
+
+# Colunas do snapshot (junção de municipiosIBGE e infoDengue), com os mesmos tipos compactos do pipeline
+SNAPSHOT_SCHEMA = pa.schema([
+    ('municipioId', pa.int32()),
+    ('municipioNome', pa.string()),
+    ('estadoNome', pa.string()),
+    ('estadoSigla', pa.string()),
+    ('regiaoNome', pa.string()),
+    ('regiaoSigla', pa.string()),
+    ('infoDengueId', pa.int64()),
+    ('ano', pa.int16()),
+    ('semana', pa.int16()),
+    ('semanaEpidemiologica', pa.string()),
+    ('casosEstimados', pa.float64()),
+    ('casosEstimadosMin', pa.float64()),
+    ('casosEstimadosMax', pa.float64()),
+    ('casosNotificados', pa.float32()),
+    ('probabilidadeRtMaiorQueUm', pa.float32()),
+    ('taxaIncidenciaPor100k', pa.float32()),
+    ('nivelAlerta', pa.float32()),
+    ('estimativaRt', pa.float32()),
+    ('populacaoEstimada', pa.float32()),
+    ('temperaturaMinMedia', pa.float32()),
+    ('temperaturaMedMedia', pa.float32()),
+    ('temperaturaMaxMedia', pa.float32()),
+    ('umidadeMinMedia', pa.float32()),
+    ('umidadeMedMedia', pa.float32()),
+    ('umidadeMaxMedia', pa.float32()),
+    ('indicadorReceptividadeClimatica', pa.float32()),
+    ('evidenciaTransmissaoSustentada', pa.float32()),
+    ('nivelIncidencia', pa.float32()),
+    ('casosAcumuladosAno', pa.float32()),
+])
+
+# Partições no formato Hive: <diretório>/ano=2024/estadoSigla=SP/part-0.parquet
+SNAPSHOT_PARTITIONING = ds.partitioning(
+    pa.schema([('ano', pa.int16()), ('estadoSigla', pa.string())]), flavor='hive'
+)
+
+# Manifesto do snapshot; arquivos iniciados por "_" são ignorados pela leitura do dataset
+MANIFEST_NAME = '_manifest.json'
+
+def write_snapshot(frames, directory=SNAPSHOT_DIR, version=None):
+    """
+    Grava o snapshot analítico em Parquet, particionado por ano e estado.
+
+    Os DataFrames são convertidos e gravados à medida que são recebidos, sem reunir a tabela
+    inteira na memória. O snapshot é gravado em um diretório temporário e só substitui o
+    anterior ao final, para que o dashboard nunca leia um snapshot incompleto.
+
+    Args:
+        frames (iterable): DataFrames com as colunas de SNAPSHOT_SCHEMA (ex.: iter_infoDengue_municipios).
+        directory (str, optional): Diretório do snapshot (padrão é SNAPSHOT_DIR).
+        version (int, optional): Versão dos dados (runId da execução), registrada no manifesto do snapshot.
+
+    Returns:
+        int: Número de linhas gravadas.
+    """
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        for frame in frames:
+            rows += len(frame)
+            table = pa.Table.from_pandas(frame[SNAPSHOT_SCHEMA.names], schema=SNAPSHOT_SCHEMA, preserve_index=False)
+            yield from table.to_batches()
+
+    tmp_directory, old_directory = directory + '.tmp', directory + '.old'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    ds.write_dataset(
+        batches(), tmp_directory, schema=SNAPSHOT_SCHEMA, format='parquet',
+        partitioning=SNAPSHOT_PARTITIONING, basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching'
+    )
+    if not rows:
+        # write_dataset não cria o diretório quando não há linhas
+        os.makedirs(tmp_directory, exist_ok=True)
+    with open(os.path.join(tmp_directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'rows': rows, 'createdAt': datetime.now(timezone.utc).isoformat()}, f)
+    shutil.rmtree(old_directory, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_directory)
+    os.replace(tmp_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+    logging.info(f'Snapshot analítico gravado em {directory} com {rows} linhas.')
+    return rows
+
+def read_snapshot(columns=None, filters=None, directory=SNAPSHOT_DIR):
+    """
+    Lê o snapshot analítico em um DataFrame.
+
+    Os arquivos são mapeados em memória e apenas as partições e colunas necessárias são lidas:
+    filtros sobre ano e estadoSigla descartam partições inteiras sem abri-las.
+
+    Args:
+        columns (list, optional): Colunas a serem lidas (padrão são todas).
+        filters (pyarrow.compute.Expression, optional): Filtro das linhas, ex.: ds.field('ano') == 2024.
+        directory (str, optional): Diretório do snapshot (padrão é SNAPSHOT_DIR).
+
+    Returns:
+        pd.DataFrame or None: DataFrame do snapshot ou None se não houver snapshot.
+    """
+    if not os.path.isdir(directory):
+        return None
+    try:
+        dataset = ds.dataset(
+            directory, schema=SNAPSHOT_SCHEMA, format='parquet', partitioning=SNAPSHOT_PARTITIONING,
+            filesystem=fs.LocalFileSystem(use_mmap=True)
+        )
+        table = dataset.to_table(columns=columns or SNAPSHOT_SCHEMA.names, filter=filters)
+        return table.to_pandas()
+    except (OSError, pa.ArrowException) as e:
+        logging.error(f'Erro ao ler o snapshot analítico {directory}: {e}')
+        return None
+
+def read_manifest(directory=SNAPSHOT_DIR):
+    """
+    Lê o manifesto do snapshot (versão dos dados, número de linhas e data de criação).
+
+    Args:
+        directory (str, optional): Diretório do snapshot (padrão é SNAPSHOT_DIR).
+
+    Returns:
+        dict or None: Manifesto do snapshot ou None se não houver snapshot ou manifesto.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def snapshot_version(directory=SNAPSHOT_DIR):
+    """
+    Obtem a versão do snapshot a partir do seu manifesto, sem ler os dados.
+
+    Args:
+        directory (str, optional): Diretório do snapshot (padrão é SNAPSHOT_DIR).
+
+    Returns:
+        str or None: Versão do snapshot ou None se não houver snapshot.
+    """
+    manifest = read_manifest(directory)
+    if manifest is not None:
+        return f"{manifest.get('version')}@{manifest.get('createdAt')}"
+    # Snapshots sem manifesto são identificados pela data de modificação do diretório
+    return str(os.stat(directory).st_mtime_ns) if os.path.isdir(directory) else None
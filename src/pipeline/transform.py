@@ -1,5 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from metrics import metrics
+import multiprocessing
 import pandas as pd
+import numpy as np
 import logging
+import asyncio
+import os
+
+# Onde as transformações são executadas: 'inline' (no próprio loop de eventos), 'thread' ou 'process'
+TRANSFORM_EXECUTOR = os.environ.get('TRANSFORM_EXECUTOR', 'inline').lower()
+# Número de workers do pool de transformações ('thread' ou 'process')
+TRANSFORM_WORKERS = int(os.environ.get('TRANSFORM_WORKERS', os.cpu_count() or 1))
+
+_transform_executor = None
+
+# Prefixo "semana/" do rótulo da semana epidemiológica, indexado pelo número da semana
+_PREFIXOS_SEMANA = np.array([f'{semana:02d}/' for semana in range(54)], dtype=object)
+
+def _metrica(coluna):
+    """
+    Converte uma coluna em float32 arredondado em duas casas decimais.
+    """
+    return np.round(pd.to_numeric(coluna).to_numpy(dtype='float64'), 2).astype('float32')
+
+def _inteiro(coluna, dtype):
+    """
+    Converte uma coluna em um array de inteiros anulável do tipo informado (ex.: 'int8', 'int32').
+    """
+    valores = pd.to_numeric(coluna).to_numpy(dtype='float64')
+    nulos = np.isnan(valores)
+    return pd.arrays.IntegerArray(np.where(nulos, 0, valores).astype(dtype), nulos)
+
+def configure_transform_executor(executor=None, workers=None):
+    """
+    Altera o executor das transformações, encerrando o pool atual se houver.
+
+    Args:
+        executor (str, optional): 'inline', 'thread' ou 'process' (padrão: mantém o atual).
+        workers (int, optional): Número de workers do pool (padrão: mantém o atual).
+    """
+    global TRANSFORM_EXECUTOR, TRANSFORM_WORKERS
+    if executor is not None:
+        if executor not in ('inline', 'thread', 'process'):
+            raise ValueError(f"Executor de transformação inválido: {executor}")
+        TRANSFORM_EXECUTOR = executor
+    if workers is not None:
+        TRANSFORM_WORKERS = workers
+    shutdown_transform_executor()
+
+def shutdown_transform_executor():
+    """
+    Encerra o pool de transformações, se tiver sido criado.
+    """
+    global _transform_executor
+    if _transform_executor is not None:
+        _transform_executor.shutdown(wait=True)
+        _transform_executor = None
+
+async def run_transform(func, *args):
+    """
+    Executa uma transformação no executor configurado em TRANSFORM_EXECUTOR.
+
+    Com 'inline' a função roda no próprio loop de eventos, bloqueando as requisições HTTP
+    enquanto o DataFrame é montado. Com 'thread' ela roda em um pool de threads, o que só
+    sobrepõe CPU e I/O nos trechos do pandas/numpy que liberam o GIL. Com 'process' ela roda
+    em um pool de processos, ao custo de serializar a entrada e o DataFrame resultante.
+
+    Args:
+        func (callable): Função de transformação síncrona, definida no nível do módulo.
+        *args: Argumentos da função.
+
+    Returns:
+        O resultado da função.
+    """
+    global _transform_executor
+    if TRANSFORM_EXECUTOR == 'inline':
+        return func(*args)
+    if _transform_executor is None:
+        if TRANSFORM_EXECUTOR == 'process':
+            # 'spawn' evita herdar por fork os locks das threads já em execução no processo principal
+            _transform_executor = ProcessPoolExecutor(
+                max_workers=TRANSFORM_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            _transform_executor = ThreadPoolExecutor(max_workers=TRANSFORM_WORKERS, thread_name_prefix='transform')
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_transform_executor, func, *args)
+
+def _frame_municipios_IBGE(json):
+    # Versão síncrona de transform_data_municipios_IBGE, executada por run_transform
+    # Percorre a estrutura aninhada microrregiao -> mesorregiao -> UF -> regiao uma única vez por município
+    registros = [
+        (municipio['id'], municipio['nome'], uf['nome'], uf['sigla'], uf['regiao']['nome'], uf['regiao']['sigla'])
+        for municipio in json
+        for uf in (municipio['microrregiao']['mesorregiao']['UF'],)
+    ]
+    municipios_df = pd.DataFrame.from_records(
+        registros,
+        columns=['municipioId', 'municipioNome', 'estadoNome', 'estadoSigla', 'regiaoNome', 'regiaoSigla']
+    )
+    municipios_df.insert(2, 'municipioNomeEstadoSigla', municipios_df['municipioNome'] + ' - ' + municipios_df['estadoSigla'])
+    return municipios_df
 
 async def transform_data_municipios_IBGE(json):
     """
@@ -12,61 +112,75 @@ async def transform_data_municipios_IBGE(json):
         pd.DataFrame or None: DataFrame dos municípios se a transformação for bem-sucedida, None se ocorrer um erro.
     """
     try:
-        data = pd.DataFrame(json)
-        municipios_df = pd.DataFrame({
-            'municipioId': data.apply(lambda x: x['id'], axis=1),
-            'municipioNome': data.apply(lambda x: x['nome'], axis=1),
-            'municipioNomeEstadoSigla': data.apply(lambda x: x['nome'], axis=1) + ' - ' + data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['sigla']),
-            'estadoNome': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['nome']),
-            'estadoSigla': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['sigla']),
-            'regiaoNome': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['regiao']['nome']),
-            'regiaoSigla': data['microrregiao'].apply(lambda x: x['mesorregiao']['UF']['regiao']['sigla'])
-        })
+        with metrics.track('transform', tabela='municipiosIBGE'):
+            municipios_df = await run_transform(_frame_municipios_IBGE, json)
         logging.info('Dados tratados e DataFrame de municípios criado.')
         return municipios_df
     except Exception as erro:
         logging.critical(f"Erro ao transformar dados do IBGE: {erro}")
         return None
 
+def _frame_infoDengue(json, ibge_code):
+    # Versão síncrona de transform_data_infoDengue, executada por run_transform
+    data = pd.DataFrame(json)
+    # Linhas sem semana epidemiológica ou id não podem ser identificadas e são descartadas antes da
+    # conversão para inteiro, que transformaria NaN em valores inválidos
+    validas = data['SE'].notna() & data['id'].notna()
+    if not validas.all():
+        logging.warning(f"{(~validas).sum()} linhas do município {ibge_code} sem SE ou id foram descartadas.")
+        data = data[validas].reset_index(drop=True)
+    metrica = lambda coluna: _metrica(data[coluna])  # Métrica com duas casas decimais
+    contagem = lambda coluna: _inteiro(data[coluna], 'int32')  # Contagem inteira, nula quando ausente
+    nivel = lambda coluna: _inteiro(data[coluna], 'int8')  # Nível ou indicador de 0 a 4, nulo quando ausente
+    estimativa = lambda coluna: pd.to_numeric(data[coluna]).to_numpy(dtype='float64')  # Estimativa sem arredondamento
+    se = data['SE'].to_numpy(dtype='int32')
+    ano = (se // 100).astype('int16') # Extraindo o ano da semana epidemiológica
+    semana = (se % 100).astype('int16') # Extraindo a semana da semana epidemiológica
+    return pd.DataFrame({
+        'municipioId': np.full(len(data), ibge_code, dtype='int32'), # Código do IBGE
+        'casosEstimados': estimativa('casos_est'), # Número estimado de casos por semana usando o modelo de nowcasting (nota: Os valores são atualizados retrospectivamente a cada semana)
+        'casosEstimadosMin': estimativa('casos_est_min'), # Intervalo minimo de credibilidade de 95% do número estimado de casos
+        'casosEstimadosMax': estimativa('casos_est_max'), # Intervalo maximo de credibilidade de 95% do número estimado de casos
+        'casosNotificados': contagem('casos'), # Número de casos notificados por semana (Os valores são atualizados retrospectivamente todas as semanas)
+        'probabilidadeRtMaiorQueUm': metrica('p_rt1'), # Probabilidade de (Rt> 1). Para emitir o alerta laranja, usamos o critério p_rt1> 0,95 por 3 semanas ou mais
+        'taxaIncidenciaPor100k': metrica('p_inc100k'), # Taxa de incidência estimada por 100.000
+        'nivelAlerta': nivel('nivel'), # Nível de alerta (1 = verde, 2 = amarelo, 3 = laranja, 4 = vermelho)
+        'infoDengueId': data['id'].to_numpy(dtype='int64'), # Índice numérico
+        'estimativaRt': metrica('Rt'), # Estimativa pontual do número reprodutivo de casos
+        'populacaoEstimada': contagem('pop'), # População estimada (IBGE)
+        'temperaturaMinMedia': metrica('tempmin'), # Média das temperaturas mínimas diárias ao longo da semana
+        'temperaturaMedMedia': metrica('tempmed'), # Média das temperaturas diárias ao longo da semana
+        'temperaturaMaxMedia': metrica('tempmax'), # Média das temperaturas máximas diárias ao longo da semana
+        'umidadeMinMedia': metrica('umidmin'), # Média da umidade relativa mínima diária do ar ao longo da semana
+        'umidadeMedMedia': metrica('umidmed'), # Média da umidade relativa diária do ar ao longo da semana
+        'umidadeMaxMedia': metrica('umidmax'), # Média da umidade relativa máxima diária do ar ao longo da semana
+        'indicadorReceptividadeClimatica': nivel('receptivo'), # Indica receptividade climática, ou seja, condições para alta capacidade vetorial. 0 = desfavorável, 1 = favorável, 2 = favorável nesta semana e na semana passada, 3 = favorável por pelo menos três semanas (suficiente para completar um ciclo de transmissão)
+        'evidenciaTransmissaoSustentada': nivel('transmissao'), # Evidência de transmissão sustentada: 0 = nenhuma evidência, 1 = possível, 2 = provável, 3 = altamente provável
+        'nivelIncidencia': nivel('nivel_inc'), # Incidência estimada abaixo do limiar pré-epidemia, 1 = acima do limiar pré-epidemia, mas abaixo do limiar epidêmico, 2 = acima do limiar epidêmico
+        'casosAcumuladosAno': contagem('notif_accum_year'), # Número acumulado de casos no ano
+        'ano': ano,
+        'semana': semana,
+        'semanaEpidemiologica': _PREFIXOS_SEMANA[semana] + ano.astype(str).astype(object) # Formatando a semana epidemiológica para o formato semana/ano
+    })
+
 async def transform_data_infoDengue(json, ibge_code):
     """
     Transforma dados de incidência de dengue em um DataFrame.
 
+    As colunas usam tipos compactos: inteiros de 16/32 bits para ids, ano e semana, inteiros
+    anuláveis de 8 bits para os níveis e indicadores, float32 para as métricas arredondadas em
+    duas casas decimais e float64 apenas para as estimativas de casos, que não são arredondadas.
+
     Args:
-        json (list): Lista de dicionários contendo dados de incidência de dengue.
+        json (list or dict): Lista de dicionários ou dicionário de colunas (ver ColumnarJSONParser) contendo dados de incidência de dengue.
         ibge_code (str): Código do município do IBGE.
 
     Returns:
         pd.DataFrame or None: DataFrame dos casos de dengue se a transformação for bem-sucedida, None se ocorrer um erro.
     """
     try:
-        data = pd.DataFrame(json)
-        dengue_df = pd.DataFrame({
-            'municipioId': ibge_code, # Código do IBGE
-            'casosEstimados': data['casos_est'], # Número estimado de casos por semana usando o modelo de nowcasting (nota: Os valores são atualizados retrospectivamente a cada semana)
-            'casosEstimadosMin': data['casos_est_min'], # Intervalo minimo de credibilidade de 95% do número estimado de casos
-            'casosEstimadosMax': data['casos_est_max'], # Intervalo maximo de credibilidade de 95% do número estimado de casos
-            'casosNotificados': data['casos'], # Número de casos notificados por semana (Os valores são atualizados retrospectivamente todas as semanas)
-            'probabilidadeRtMaiorQueUm': round(data['p_rt1'], 2), # Probabilidade de (Rt> 1). Para emitir o alerta laranja, usamos o critério p_rt1> 0,95 por 3 semanas ou mais
-            'taxaIncidenciaPor100k': round(data['p_inc100k'], 2), # Taxa de incidência estimada por 100.000
-            'nivelAlerta': data['nivel'], # Nível de alerta (1 = verde, 2 = amarelo, 3 = laranja, 4 = vermelho)
-            'infoDengueId': data['id'], # Índice numérico
-            'estimativaRt': round(data['Rt'], 2), # Estimativa pontual do número reprodutivo de casos
-            'populacaoEstimada': data['pop'], # População estimada (IBGE)
-            'temperaturaMinMedia': round(data['tempmin'], 2), # Média das temperaturas mínimas diárias ao longo da semana
-            'temperaturaMedMedia': round(data['tempmed'], 2), # Média das temperaturas diárias ao longo da semana
-            'temperaturaMaxMedia': round(data['tempmax'], 2), # Média das temperaturas máximas diárias ao longo da semana
-            'umidadeMinMedia': round(data['umidmin'], 2), # Média da umidade relativa mínima diária do ar ao longo da semana
-            'umidadeMedMedia': round(data['umidmed'], 2), # Média da umidade relativa diária do ar ao longo da semana
-            'umidadeMaxMedia': round(data['umidmax'], 2), # Média da umidade relativa máxima diária do ar ao longo da semana
-            'indicadorReceptividadeClimatica': data['receptivo'], # Indica receptividade climática, ou seja, condições para alta capacidade vetorial. 0 = desfavorável, 1 = favorável, 2 = favorável nesta semana e na semana passada, 3 = favorável por pelo menos três semanas (suficiente para completar um ciclo de transmissão)
-            'evidenciaTransmissaoSustentada': data['transmissao'], # Evidência de transmissão sustentada: 0 = nenhuma evidência, 1 = possível, 2 = provável, 3 = altamente provável
-            'nivelIncidencia': data['nivel_inc'], # Incidência estimada abaixo do limiar pré-epidemia, 1 = acima do limiar pré-epidemia, mas abaixo do limiar epidêmico, 2 = acima do limiar epidêmico
-            'casosAcumuladosAno': data['notif_accum_year'], # Número acumulado de casos no ano
-            'ano': data['SE'] // 100, # Extraindo o ano da semana epidemiológica
-            'semana': data['SE'] % 100, # Extraindo a semana da semana epidemiológica
-            'semanaEpidemiologica': data['SE'].apply(lambda x: f"{(x % 100):02d}/{x // 100}") # Formatando a semana epidemiológica para o formato semana/ano
-        })
+        with metrics.track('transform', tabela='infoDengue'):
+            dengue_df = await run_transform(_frame_infoDengue, json, ibge_code)
         logging.info(f'Dados tratados e DataFrame de dengue criado para o município: {ibge_code}.')
         return dengue_df
     except Exception as erro: